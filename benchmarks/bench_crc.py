@@ -0,0 +1,89 @@
+"""
+Microbenchmark of the frame CRC-16 validation.
+
+Compares the original per-byte table loop of ``PacketFrame.check_crc`` with the
+native ``crc16`` based check, and with the batch API.
+
+Usage:
+    python benchmarks/bench_crc.py [--frames 100000] [--payload 40]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from radcontrol.frame.crc import check_crc_batch, check_crc_buffer, crc16
+from radcontrol.frame.crc_table import crcTable
+
+
+def legacy_check_crc(payload, crc_bytes):
+    """
+    Copy of the original ``PacketFrame.check_crc`` body.
+    """
+    crc = (crc_bytes[0] << 8) | crc_bytes[1]
+
+    payload_hex = [hex(byte) for byte in payload]
+    INITIAL_REMAINDER = 0xFFFF
+    FINAL_XOR_VALUE = 0x0000
+    remainder = INITIAL_REMAINDER
+
+    for byte in range(len(payload)):
+        data = payload[byte] ^ (remainder >> (16 - 8))
+        remainder = crcTable[data] ^ (remainder << 8) & 0xFFFF
+
+    return crc == (remainder ^ FINAL_XOR_VALUE)
+
+
+def build_frames(count, payload_length, seed=1234):
+    rng = random.Random(seed)
+    frames = []
+    for _ in range(count):
+        payload = bytes(rng.getrandbits(8) for _ in range(payload_length))
+        crc = crc16(payload).to_bytes(2, "big")
+        frames.append(bytes([0xAA, 0, payload_length]) + payload + crc + b"\x55")
+    return frames
+
+
+def timed(name, count, func):
+    start = time.perf_counter()
+    valid = func()
+    elapsed = time.perf_counter() - start
+    assert valid == count, f"{name}: only {valid}/{count} frames valid"
+    print(f"{name:>8}: {elapsed:.3f}s -> {count / elapsed:,.0f} frames/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--payload", type=int, default=40, help="payload bytes")
+    args = parser.parse_args()
+
+    frames = build_frames(args.frames, args.payload)
+    parts = [(frame[3:-3], frame[-3:-1]) for frame in frames]
+    capture = b"".join(frames)
+    print(f"{args.frames} frames with {args.payload} byte payload")
+
+    timed(
+        "legacy",
+        args.frames,
+        lambda: sum(legacy_check_crc(p, c) for p, c in parts),
+    )
+    timed(
+        "native",
+        args.frames,
+        lambda: sum(((c[0] << 8) | c[1]) == crc16(p) for p, c in parts),
+    )
+    timed("batch", args.frames, lambda: sum(check_crc_batch(frames)))
+    timed(
+        "buffer",
+        args.frames,
+        lambda: sum(valid for _, valid in check_crc_buffer(capture)),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark the DUT frame extraction on a noisy byte stream.
+
+Compares the original ``DUT.process_buffer`` algorithm (pop garbage one byte at
+a time, re-slice the buffer after every frame) with ``FrameExtractor``.
+
+Usage:
+    python benchmarks/bench_frame_extractor.py [--size-mb 10] [--chunk 4096]
+"""
+
+import argparse
+import binascii
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from radcontrol.frame.frame_extractor import FrameExtractor
+
+
+def build_frame(frame_id, payload):
+    crc = binascii.crc_hqx(payload, 0xFFFF)
+    return (
+        bytes([0xAA, frame_id, len(payload)])
+        + payload
+        + crc.to_bytes(2, "big")
+        + b"\x55"
+    )
+
+
+def build_stream(size, noise_ratio=0.3, seed=1234):
+    """
+    Build a stream of valid frames interleaved with runs of random noise.
+    """
+    rng = random.Random(seed)
+    chunks = []
+    total = 0
+    frames = 0
+    while total < size:
+        if rng.random() < noise_ratio:
+            chunk = bytes(rng.getrandbits(8) for _ in range(rng.randint(1, 512)))
+        else:
+            payload = bytes(
+                rng.getrandbits(8) for _ in range(rng.choice((4, 12, 20, 40)))
+            )
+            chunk = build_frame(rng.randint(0, 16), payload)
+            frames += 1
+        chunks.append(chunk)
+        total += len(chunk)
+    return b"".join(chunks), frames
+
+
+class LegacyExtractor:
+    """
+    Copy of the original ``DUT.process_buffer`` loop.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer.extend(data)
+
+    def frames(self):
+        while True:
+            if len(self.buffer) < 6:
+                break
+
+            header = self.buffer[0:1]
+            if header != b"\xaa":
+                self.buffer.pop(0)
+                continue
+
+            payload_length = self.buffer[2]
+            total_length = 1 + 1 + 1 + payload_length + 2 + 1
+            if len(self.buffer) < total_length:
+                break
+
+            full_message = self.buffer[:total_length]
+            if full_message[-1:] != b"\x55":
+                self.buffer.pop(0)
+                continue
+
+            yield full_message
+            self.buffer = self.buffer[total_length:]
+
+
+def run(extractor, stream, chunk_size):
+    frames = 0
+    start = time.perf_counter()
+    for offset in range(0, len(stream), chunk_size):
+        extractor.feed(stream[offset : offset + chunk_size])
+        for frame in extractor.frames():
+            bytes(frame)
+            frames += 1
+    return frames, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=10)
+    parser.add_argument("--chunk", type=int, default=4096, help="bytes per read")
+    args = parser.parse_args()
+
+    stream, sent = build_stream(int(args.size_mb * 1024 * 1024))
+    print(f"Stream: {len(stream) / 1e6:.1f} MB, {sent} frames, read size {args.chunk}")
+
+    for name, extractor in (
+        ("legacy", LegacyExtractor()),
+        ("cursor", FrameExtractor()),
+    ):
+        frames, elapsed = run(extractor, stream, args.chunk)
+        print(
+            f"{name:>8}: {frames} frames in {elapsed:.2f}s "
+            f"-> {frames / elapsed:,.0f} frames/s, {len(stream) / elapsed / 1e6:.1f} MB/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare memory and build time per frame of the PacketFrame representations.
+
+``legacy`` is the original six-attribute PacketFrame built from the bytearray
+slices ``DUT.process_message`` used to create. ``compact`` is the slotted
+PacketFrame wrapping one immutable buffer, as built by ``DUT.build_packet``.
+
+Usage:
+    python benchmarks/bench_frame_memory.py [--frames 100000] [--payload 40]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+os.chdir(os.path.join(os.path.dirname(__file__), ".."))
+
+from radcontrol.frame.crc import crc16
+from radcontrol.frame.frame_decoder import PacketFrame
+
+
+class LegacyPacketFrame:
+    def __init__(self, header, frame_id, payload_length, payload, crc_bytes, tail):
+        self.header = header
+        self.frame_id = frame_id
+        self.payload_length = payload_length
+        self.payload = payload
+        self.crc_bytes = crc_bytes
+        self.tail = tail
+
+
+def build_legacy(message):
+    message = bytearray(message)
+    payload_length = message[2]
+    return LegacyPacketFrame(
+        message[0:1],
+        message[1:2],
+        payload_length,
+        message[3 : 3 + payload_length],
+        message[3 + payload_length : 3 + payload_length + 2],
+        message[-1:],
+    )
+
+
+def build_compact(message):
+    return PacketFrame.from_bytes(bytes(message))
+
+
+def measure(build, messages):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    frames = [build(message) for message in messages]
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del frames
+    return size / len(messages), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--payload", type=int, default=40, help="payload bytes")
+    args = parser.parse_args()
+
+    payload = bytes(range(args.payload))
+    frame = (
+        bytes([0xAA, 0, args.payload])
+        + payload
+        + crc16(payload).to_bytes(2, "big")
+        + b"\x55"
+    )
+    # Both builders receive a fresh view, like DUT.build_packet does
+    source = bytearray(frame * args.frames)
+    view = memoryview(source)
+    messages = [view[i * len(frame) : (i + 1) * len(frame)] for i in range(args.frames)]
+    print(f"{args.frames} frames with {args.payload} byte payload")
+
+    for name, build in (("legacy", build_legacy), ("compact", build_compact)):
+        per_frame, elapsed = measure(build, messages)
+        print(
+            f"{name:>8}: {per_frame:.0f} bytes/frame, "
+            f"{args.frames / elapsed:,.0f} frames/s built"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark the monitor-thread throughput with queued logging off and on.
+
+Feeds batches of valid frames through ``DUT.handle_batch``, which logs every
+frame as hex, and reports how many frames per second the monitor thread gets
+through. With queued logging the time until the background writer has written
+everything is reported as well.
+
+Runs in a temporary folder, the PTY consoles are drained by a reader thread.
+
+Usage:
+    python benchmarks/bench_logging.py [--frames 100000] [--batch 64]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, repo_root)
+
+import radcontrol
+from devices.dut import DUT
+from frame.crc import crc16
+from frame.frame_decoder import DEFAULT_FRAME_FORMAT, PacketFrame
+from host.log_id import DUT_QUEUE_NORMAL
+from radcontrol.utils.logger import QueuedLogWriter
+
+
+def drain_console(name):
+    with open("/tmp/logger_" + name, "rb", buffering=0) as console:
+        while console.read(65536):
+            pass
+
+
+def build_batches(frames, batch_size):
+    payload = bytes(range(20))
+    raw = (
+        bytes([0xAA, 3, len(payload)])
+        + payload
+        + crc16(payload).to_bytes(2, "big")
+        + b"\x55"
+    )
+    frame = PacketFrame.from_bytes(raw)
+    return [[frame] * batch_size for _ in range(frames // batch_size)]
+
+
+def run(name, queued, batches):
+    dut_info = {
+        "name": name,
+        "url": "loop://",
+        "timeout": 1,
+        "baudrate": 115200,
+        "power_switch_port": 9,
+        "power_port_IP": "127.0.0.1",
+        "queued_logging": queued,
+    }
+    dut = DUT(dut_info, None)
+    threading.Thread(target=drain_console, args=(name,), daemon=True).start()
+
+    frames = sum(len(batch) for batch in batches)
+    start = time.perf_counter()
+    for batch in batches:
+        dut.handle_batch(batch, DUT_QUEUE_NORMAL)
+    monitor_elapsed = time.perf_counter() - start
+
+    if queued:
+        writer = QueuedLogWriter.get()
+        while not writer.queue.empty():
+            time.sleep(0.001)
+    total_elapsed = time.perf_counter() - start
+
+    print(
+        f"{'queued' if queued else 'direct':>8}: monitor {frames / monitor_elapsed:,.0f} frames/s, "
+        f"written after {total_elapsed:.2f}s ({frames / total_elapsed:,.0f} frames/s)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=64, help="frames per batch")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_logging_")
+    shutil.copy(DEFAULT_FRAME_FORMAT, workdir)
+    os.chdir(workdir)
+
+    batches = build_batches(args.frames, args.batch)
+    print(f"{args.frames} frames in batches of {args.batch}, logs in {workdir}")
+    run("benchDirect", False, batches)
+    run("benchQueued", True, batches)
+
+
+if __name__ == "__main__":
+    main()
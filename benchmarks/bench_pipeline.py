@@ -0,0 +1,290 @@
+"""
+Benchmark the whole DUT acquisition pipeline and report the results as JSON.
+
+Synthetic frames built from the frame ID formatting file are written to a
+local socket (or a pyserial ``loop://`` port) and go through the real
+``DUT.read`` -> ``process_buffer`` -> ``monitor`` path, logging included.
+Reports frames/s and bytes/s, the CPU time of the read and monitor threads
+per frame and the p50/p99 latency from writing a frame to the monitor having
+handled it. Runs in a temporary folder, the PTY console is drained by a reader
+thread.
+
+DUT configuration fields can be set with ``--option``, e.g.
+``--option text_log=false --option queued_logging=true``, to compare
+settings. Save the JSON of each run to compare them over time.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--frames 50000] [--rate 0]
+        [--mix 0:1,2:1,3:2] [--crc-error-rate 0] [--noise 0]
+        [--transport socket] [--option KEY=VALUE] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, repo_root)
+
+import yaml
+
+import radcontrol
+from devices.dut import DUT
+from frame.decoder_registry import DecoderRegistry
+from frame.frame_decoder import DEFAULT_FRAME_FORMAT
+from host.supervisor import EXIT_REASONS
+from frame_generator import FrameGenerator, parse_mix
+
+
+class BenchDUT(DUT):
+    """
+    DUT recording when each frame was handled and the CPU time of its threads.
+    """
+
+    def __init__(self, dut_info, expected):
+        super().__init__(dut_info, None)
+        self.expected = expected
+        self.handled = 0
+        self.handled_at = {}  # Maps sequence numbers to handling times
+        self.thread_cpu = {}
+        self.done = threading.Event()
+
+    def read(self):
+        try:
+            super().read()
+        finally:
+            self.thread_cpu["read"] = time.thread_time()
+
+    def monitor(self):
+        try:
+            super().monitor()
+        finally:
+            self.thread_cpu["monitor"] = time.thread_time()
+            self.done.set()  # Also when the monitor gave up, e.g. on CRC errors
+
+    def handle_data(self, data, error_code):
+        result = super().handle_data(data, error_code)
+        if data is not None:
+            now = time.perf_counter()
+            payload = data.payload
+            if len(payload) >= FrameGenerator.SEQUENCE_BYTES:
+                self.handled_at[int.from_bytes(payload[:4], "big")] = now
+            self.handled += 1
+            if self.handled >= self.expected:
+                self.done.set()
+        return result
+
+
+def drain_console(name):
+    with open("/tmp/logger_" + name, "rb", buffering=0) as console:
+        while console.read(65536):
+            pass
+
+
+def send_chunks(write, chunks, rate, sent_at):
+    """
+    Write the chunks, paced to rate frames/s (0: as fast as possible), and
+    record the time each frame was written.
+    """
+    start = time.perf_counter()
+    for first, count, data in chunks:
+        if rate:
+            delay = start + first / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        write(data)
+        now = time.perf_counter()
+        for sequence in range(first, first + count):
+            sent_at[sequence] = now
+
+
+def open_transport(transport, dut_info):
+    """
+    Prepare the data source of a DUT and set its url in dut_info.
+
+    Returns:
+        callable: Called with the DUT, waits for it to connect and returns a
+        function writing bytes to it.
+    """
+    if transport == "loop":
+        dut_info["url"] = "loop://"
+
+        def connect(dut):
+            while dut.serial is None:
+                time.sleep(0.01)
+            time.sleep(0.1)  # The DUT flushes its input right after opening
+            return dut.serial.write
+
+        return connect
+
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    dut_info["url"] = "socket://127.0.0.1:%d" % server.getsockname()[1]
+
+    def connect(dut):
+        connection, _ = server.accept()
+        server.close()
+        time.sleep(0.1)
+        return connection.sendall
+
+    return connect
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=repo_root,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args, generator):
+    chunks = generator.chunks(args.frames, args.chunk_frames)
+    total_bytes = sum(len(data) for _, _, data in chunks)
+
+    dut_info = {
+        "name": "benchPipeline",
+        "url": None,
+        "timeout": args.timeout,
+        "baudrate": 115200,
+        "power_switch_port": 9,
+        "power_port_IP": "127.0.0.1",
+    }
+    for option in args.option:
+        key, _, value = option.partition("=")
+        dut_info[key] = yaml.safe_load(value)
+
+    connect = open_transport(args.transport, dut_info)
+    dut = BenchDUT(dut_info, args.frames)
+    threading.Thread(target=drain_console, args=(dut.name,), daemon=True).start()
+
+    monitor_thread = threading.Thread(target=dut.monitor, daemon=True)
+    monitor_thread.start()
+    write = connect(dut)
+
+    sent_at = {}
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    send_chunks(write, chunks, args.rate, sent_at)
+    dut.done.wait(timeout=args.timeout)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    # Monitor exit before the benchmark stopped it, None if it kept running
+    exit_reason = EXIT_REASONS.get(dut.exit_reason)
+
+    dut.stop()
+    monitor_thread.join(timeout=5)
+
+    latencies = [
+        (dut.handled_at[sequence] - sent) * 1000
+        for sequence, sent in sent_at.items()
+        if sequence in dut.handled_at
+    ]
+    handled = dut.handled
+    thread_cpu = sum(dut.thread_cpu.values())
+    return {
+        "frames_sent": args.frames,
+        "frames_handled": handled,
+        "completed": dut.handled >= args.frames,
+        "monitor_exit": exit_reason,
+        "bytes": total_bytes,
+        "elapsed_s": elapsed,
+        "frames_per_s": handled / elapsed,
+        "bytes_per_s": total_bytes / elapsed,
+        "pipeline_cpu_us_per_frame": thread_cpu / max(handled, 1) * 1e6,
+        "process_cpu_us_per_frame": cpu / max(handled, 1) * 1e6,
+        "latency_ms": {
+            "samples": len(latencies),
+            "p50": percentile(latencies, 0.50) if latencies else None,
+            "p99": percentile(latencies, 0.99) if latencies else None,
+            "mean": statistics.fmean(latencies) if latencies else None,
+        },
+        "dut_options": dict(option.split("=", 1) for option in args.option),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=50000)
+    parser.add_argument(
+        "--rate", type=float, default=0, help="frames/s, 0 sends as fast as possible"
+    )
+    parser.add_argument(
+        "--mix", default=None, help="frame ID weights, e.g. 0:1,3:2 (default: all IDs)"
+    )
+    parser.add_argument("--crc-error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--noise", type=float, default=0.0, help="chance of noise before a frame"
+    )
+    parser.add_argument("--chunk-frames", type=int, default=64, help="frames per write")
+    parser.add_argument("--transport", choices=("socket", "loop"), default="socket")
+    parser.add_argument("--frame-format", default=DEFAULT_FRAME_FORMAT)
+    parser.add_argument(
+        "--timeout", type=float, default=60, help="seconds to wait for all frames"
+    )
+    parser.add_argument(
+        "--option", action="append", default=[], help="DUT configuration KEY=VALUE"
+    )
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="write the JSON to this file")
+    args = parser.parse_args()
+
+    registry = DecoderRegistry.from_yaml(args.frame_format)
+    generator = FrameGenerator(
+        registry,
+        mix=parse_mix(args.mix) if args.mix else None,
+        crc_error_rate=args.crc_error_rate,
+        noise_ratio=args.noise,
+        seed=args.seed,
+    )
+
+    if args.output:
+        # Relative to where the benchmark was started, not to its work folder
+        args.output = os.path.abspath(args.output)
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    shutil.copy(args.frame_format, os.path.join(workdir, "frame_id_formatting.yaml"))
+    os.chdir(workdir)
+
+    result = {
+        "benchmark": "pipeline",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "transport": args.transport,
+        "rate": args.rate,
+        "mix": {str(k): v for k, v in zip(generator.frame_ids, generator.weights)},
+        "crc_error_rate": args.crc_error_rate,
+        "noise": args.noise,
+        "results": run(args, generator),
+        "logs": workdir,
+    }
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark the recovery time of simultaneous power cycles against simulated switches.
+
+Starts one PowerSwitchSimulator per 8 DUTs, with the chosen latency, error and
+hang rates, then power cycles every DUT at once through
+``Server.power_cycle_dut`` and measures, per DUT, the time from the request to
+the power cycle future resolving. Checks on the simulators that every outlet
+was switched off and on again.
+
+Usage:
+    python benchmarks/bench_power_recovery.py [--duts 16] [--interval 1]
+        [--latency 0.05] [--error-rate 0] [--hang-rate 0] [--ut-lab]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, repo_root)
+
+import radcontrol
+from host.server import Server
+from radcontrol.power_switch.error_codes import ErrorCodes
+from radcontrol.power_switch.powerswitch import PowerSwitchController
+from radcontrol.power_switch.simulator import PowerSwitchSimulator
+from radcontrol.utils.logger import Logger
+from radcontrol.utils.metrics import DUTMetrics
+
+OUTLETS_PER_SWITCH = 8  # Ports above 8 are not power switched
+
+
+def build_server(controller, interval):
+    # Only what power_cycle_dut needs, without starting DUTs or the main loop
+    server = Server.__new__(Server)
+    server.reboot_interval = interval
+    server.server_logger = Logger(mode="Server", verbose=1)
+    server.power_controller = controller
+    return server
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(server, duts, simulators):
+    done_at = {}
+    all_done = threading.Event()
+    lock = threading.Lock()
+
+    def record(name):
+        # Done-callbacks may still be running after wait() returned, so the
+        # last one to record its time signals completion
+        with lock:
+            done_at.setdefault(name, time.monotonic())
+            if len(done_at) == len(duts):
+                all_done.set()
+
+    start = time.monotonic()
+    futures = {}
+    for dut in duts:
+        future = server.power_cycle_dut(dut)
+        future.add_done_callback(lambda _, name=dut.name: record(name))
+        futures[dut.name] = future
+    all_done.wait()
+    total = max(done_at.values()) - start
+
+    statuses = {}
+    for future in futures.values():
+        status = future.exception() or future.result()
+        name = status.name if isinstance(status, ErrorCodes) else type(status).__name__
+        statuses[name] = statuses.get(name, 0) + 1
+
+    # Cycled during this run: switched off and on again since start
+    cycled = sum(
+        1
+        for dut in duts
+        if simulators[dut.switch].power_cycles(dut.power_switch_port - 1, start) > 0
+    )
+    recoveries = [done_at[name] - start for name in futures]
+    return total, recoveries, statuses, cycled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--duts", type=int, default=16)
+    parser.add_argument(
+        "--interval", type=float, default=1.0, help="seconds between off and on"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="switch response time, seconds"
+    )
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--read-timeout", type=float, default=2.0, help="switch request timeout"
+    )
+    parser.add_argument(
+        "--ut-lab", action="store_true", help="drive UT lab instead of Lindy switches"
+    )
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="bench_power_"))
+
+    switch_count = -(-args.duts // OUTLETS_PER_SWITCH)
+    simulators = [
+        PowerSwitchSimulator(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            hang_rate=args.hang_rate,
+            hang_time=args.read_timeout * 2,
+            seed=args.seed + index,
+        ).start()
+        for index in range(switch_count)
+    ]
+    # Stand-ins with the DUT attributes power_cycle_dut uses
+    duts = [
+        types.SimpleNamespace(
+            name=f"dut{index}",
+            switch=index // OUTLETS_PER_SWITCH,
+            power_switch_port=index % OUTLETS_PER_SWITCH + 1,
+            power_port_IP=simulators[index // OUTLETS_PER_SWITCH].address,
+            metrics=DUTMetrics(),
+        )
+        for index in range(args.duts)
+    ]
+
+    controller = PowerSwitchController(
+        args.ut_lab,
+        connection_options={"read_timeout": args.read_timeout},
+    )
+    server = build_server(controller, args.interval)
+    for dut in duts:
+        dut.power_controller = controller
+
+    print(
+        f"{args.duts} DUTs on {switch_count} {'UT lab' if args.ut_lab else 'Lindy'} "
+        f"switch(es), interval {args.interval}s, latency {args.latency}s, "
+        f"error rate {args.error_rate}, hang rate {args.hang_rate}"
+    )
+    try:
+        for index in range(args.runs):
+            total, recoveries, statuses, cycled = run(server, duts, simulators)
+            print(
+                f"run {index + 1}: all done after {total:.2f}s, "
+                f"p50 {statistics.median(recoveries):.2f}s, "
+                f"p99 {percentile(recoveries, 0.99):.2f}s, "
+                f"{cycled}/{args.duts} outlets cycled, {statuses}"
+            )
+    finally:
+        requests = sum(len(simulator.requests) for simulator in simulators)
+        injected = sum(simulator.errors + simulator.hangs for simulator in simulators)
+        print(f"{requests} switch requests, {injected} with an injected fault")
+        for switch_ip, stats in controller.switch_stats().items():
+            print(
+                f"  {switch_ip}: mean latency {stats['mean_latency'] * 1000:.0f} ms, "
+                f"{stats['errors']} errors"
+                + (", circuit open" if stats["circuit_open"] else "")
+            )
+        controller.shutdown()
+        for simulator in simulators:
+            simulator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""
+Measure how many DUTs one server follows before frames are lost.
+
+For every count of ``--duts``, starts that many virtual boards: local TCP
+servers streaming frames from FrameGenerator at ``--rate`` frames/s each. A
+matching dut_config.yaml is written (``socket://`` URLs, power_switch_port 9
+so nothing is power cycled) and the Server runs against it in a headless
+subprocess, stopped through its menu at the end.
+
+Like a UART, a board holds at most ``--board-buffer`` bytes the host did not
+read yet and drops frames beyond that. Lost frames are the frames a board
+generated that never reached the DUT text log, whether dropped by the board or
+by the server. Also reports the server CPU time per DUT, its thread count and
+peak memory, sampled from /proc (Linux only).
+
+All boards are served by one thread of this process, run it on a machine with
+more cores than the server needs to measure the server alone.
+
+Usage:
+    python benchmarks/bench_scale.py [--duts 10,50,100] [--rate 100]
+        [--duration 10] [--engine thread] [--option KEY=VALUE] [--output scale.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, repo_root)
+
+import yaml
+
+import radcontrol
+from file_manager import load_config
+from radcontrol.run_server import SERVER_CONFIG
+from frame.decoder_registry import DecoderRegistry
+from frame.frame_decoder import DEFAULT_FRAME_FORMAT
+from radcontrol.utils.log_converter import parse_log
+from frame_generator import FrameGenerator, parse_mix
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+class VirtualBoard:
+    """
+    A local TCP server standing in for a board, streaming frames to the DUT
+    connected to it. Driven by BoardDriver, which calls step() periodically.
+    """
+
+    def __init__(self, generator, rate, buffer_size):
+        self.generator = generator
+        self.rate = rate
+        self.buffer_size = buffer_size
+        self.listener = socket.socket()
+        self.listener.bind(("127.0.0.1", 0))
+        self.listener.listen(1)
+        self.listener.setblocking(False)
+        self.url = "socket://127.0.0.1:%d" % self.listener.getsockname()[1]
+
+        self.connection = None
+        self.connected_at = None
+        self.pending = bytearray()  # Generated but not yet read by the host
+        self.sequence = 0  # Frames generated, numbering continues on reconnects
+        self.dropped = 0  # Frames dropped because the host did not keep up
+        self.connections = 0
+        self._due = 0.0
+
+    def step(self, now, streaming):
+        if self.connection is None:
+            try:
+                self.connection, _ = self.listener.accept()
+            except BlockingIOError:
+                return
+            self.connection.setblocking(False)
+            self.connections += 1
+            self.connected_at = now
+            self._last = now
+            # Start streaming once the DUT flushed its input after connecting
+            self._due = -self.rate * 0.2
+            self.pending.clear()
+
+        if streaming:
+            self._due += (now - self._last) * self.rate
+            while self._due >= 1:
+                self._due -= 1
+                frame = self.generator.frame(self.sequence)[0]
+                self.sequence += 1
+                if len(self.pending) + len(frame) > self.buffer_size:
+                    self.dropped += 1
+                else:
+                    self.pending += frame
+        self._last = now
+
+        if self.pending:
+            try:
+                sent = self.connection.send(self.pending)
+            except BlockingIOError:
+                return
+            except OSError:
+                self.connection.close()
+                self.connection = None
+                return
+            del self.pending[:sent]
+
+    def close(self):
+        if self.connection:
+            self.connection.close()
+        self.listener.close()
+
+
+class BoardDriver:
+    """
+    Single thread stepping every board, ``tick`` seconds apart.
+    """
+
+    def __init__(self, boards, tick=0.01):
+        self.boards = boards
+        self.tick = tick
+        self.streaming = True
+        self._stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop_event.wait(self.tick):
+            now = time.monotonic()
+            for board in self.boards:
+                board.step(now, self.streaming)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self.thread.join()
+        for board in self.boards:
+            board.close()
+
+
+def read_proc(pid):
+    """
+    Return the CPU seconds, thread count and resident memory (bytes) of a
+    process.
+    """
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rpartition(")")[2].split()
+    cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+    threads = rss = 0
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("Threads:"):
+                threads = int(line.split()[1])
+            elif line.startswith("VmRSS:"):
+                rss = int(line.split()[1]) * 1024
+    return cpu, threads, rss
+
+
+def count_logged(workdir, name):
+    """
+    Return the distinct sequence numbers of the frames in the logs of a DUT.
+    """
+    sequences = set()
+    folder = os.path.join(workdir, "logs", name)
+    for file_name in os.listdir(folder) if os.path.isdir(folder) else ():
+        if file_name.endswith(".log"):
+            for _, frame in parse_log(os.path.join(folder, file_name)):
+                if len(frame) >= 3 + FrameGenerator.SEQUENCE_BYTES + 3:
+                    sequences.add(int.from_bytes(frame[3:7], "big"))
+    return sequences
+
+
+def run_child(settings):
+    """
+    Run the Server like run_server does, with server_config.yaml defaults and
+    the overrides of the harness.
+    """
+    import resource
+    from argparse import Namespace
+    from host.server import Server
+
+    # Every DUT holds a PTY, a log file and a socket open
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    config = load_config(SERVER_CONFIG)
+    options = {
+        param: details["value"]
+        for params in config.values()
+        for param, details in params.items()
+    }
+    options.update(settings)
+    Server(Namespace(**options))
+
+
+def run(args, count, registry, mix):
+    workdir = tempfile.mkdtemp(prefix=f"bench_scale_{count}_")
+    boards = [
+        VirtualBoard(
+            FrameGenerator(registry, mix=mix, seed=args.seed + index),
+            args.rate,
+            args.board_buffer,
+        )
+        for index in range(count)
+    ]
+    duts = []
+    for index, board in enumerate(boards):
+        dut_info = {
+            "name": f"vb{index}",
+            "url": board.url,
+            "timeout": args.dut_timeout,
+            "baudrate": 115200,
+            "power_switch_port": 9,  # Above 8: never power cycled
+            "power_port_IP": "127.0.0.1",
+        }
+        for option in args.option:
+            key, _, value = option.partition("=")
+            dut_info[key] = yaml.safe_load(value)
+        duts.append(dut_info)
+    dut_config = os.path.join(workdir, "dut_config.yaml")
+    with open(dut_config, "w") as file:
+        yaml.safe_dump(duts, file, sort_keys=False)
+
+    driver = BoardDriver(boards).start()
+    settings = {
+        "dut_config": dut_config,
+        "engine": args.engine,
+        "headless": True,
+        "watch_config": False,
+        "parallel_startup": True,
+        "power_cycle_interval": 0,
+        "is_debug_test": False,
+    }
+    with open(os.path.join(workdir, "server.out"), "wb") as output:
+        child = subprocess.Popen(
+            [
+                sys.executable,
+                os.path.abspath(__file__),
+                "--child",
+                json.dumps(settings),
+            ],
+            cwd=workdir,
+            stdin=subprocess.PIPE,
+            stdout=output,
+            stderr=subprocess.STDOUT,
+        )
+    start = time.monotonic()
+    try:
+        # Bring-up: wait for every DUT to connect
+        while time.monotonic() - start < args.startup_timeout:
+            if all(board.connections for board in boards) or child.poll() is not None:
+                break
+            time.sleep(0.1)
+        connected = sum(1 for board in boards if board.connections)
+        startup = time.monotonic() - start
+        time.sleep(args.warmup)
+
+        cpu_start = read_proc(child.pid)[0]
+        measure_start = time.monotonic()
+        threads = rss = 0
+        while time.monotonic() - measure_start < args.duration:
+            if child.poll() is not None:
+                break
+            _, sample_threads, sample_rss = read_proc(child.pid)
+            threads = max(threads, sample_threads)
+            rss = max(rss, sample_rss)
+            time.sleep(0.5)
+        cpu = read_proc(child.pid)[0] - cpu_start
+        elapsed = time.monotonic() - measure_start
+
+        # Let the server catch up, then stop it through the menu
+        driver.streaming = False
+        drain_start = time.monotonic()
+        while any(board.pending for board in boards):
+            if time.monotonic() - drain_start > args.drain:
+                break
+            time.sleep(0.1)
+        time.sleep(1)
+        child.stdin.write(b"4\n")
+        child.stdin.flush()
+        child.wait(timeout=60)
+    except (subprocess.TimeoutExpired, OSError):
+        child.kill()
+        child.wait()
+    finally:
+        driver.stop()
+
+    sent = sum(board.sequence for board in boards)
+    logged = sum(len(count_logged(workdir, dut["name"])) for dut in duts)
+    reconnects = sum(max(board.connections - 1, 0) for board in boards)
+    return {
+        "duts": count,
+        "connected": connected,
+        "startup_s": startup,
+        "frames_sent": sent,
+        "frames_logged": logged,
+        "frames_lost": sent - logged,
+        "lost_pct": 100.0 * (sent - logged) / sent if sent else 0.0,
+        "dropped_by_boards": sum(board.dropped for board in boards),
+        "reconnects": reconnects,
+        "cpu_pct": 100.0 * cpu / elapsed,
+        "cpu_pct_per_dut": 100.0 * cpu / elapsed / count,
+        "threads": threads,
+        "rss_mb": rss / 2**20,
+        "logs": workdir,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--duts", default="10,50,100", help="comma separated DUT counts to run"
+    )
+    parser.add_argument("--rate", type=float, default=100, help="frames/s per board")
+    parser.add_argument(
+        "--mix", default=None, help="frame ID weights, e.g. 0:1,3:2 (default: all IDs)"
+    )
+    parser.add_argument("--engine", choices=("thread", "async"), default="thread")
+    parser.add_argument(
+        "--duration", type=float, default=10, help="seconds of measurement"
+    )
+    parser.add_argument("--warmup", type=float, default=2)
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    parser.add_argument(
+        "--drain", type=float, default=10, help="seconds to let the server catch up"
+    )
+    parser.add_argument(
+        "--board-buffer",
+        type=int,
+        default=4096,
+        help="bytes a board holds for the host before dropping frames",
+    )
+    parser.add_argument("--dut-timeout", type=float, default=30)
+    parser.add_argument("--frame-format", default=DEFAULT_FRAME_FORMAT)
+    parser.add_argument(
+        "--option", action="append", default=[], help="DUT configuration KEY=VALUE"
+    )
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="write the JSON to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(json.loads(args.child))
+        return
+
+    registry = DecoderRegistry.from_yaml(args.frame_format)
+    mix = parse_mix(args.mix) if args.mix else None
+
+    results = []
+    print(
+        f"{'DUTs':>5} {'sent':>9} {'lost':>7} {'lost %':>7} {'CPU %':>7} "
+        f"{'CPU %/DUT':>9} {'threads':>7} {'RSS MB':>7}"
+    )
+    for count in (int(value) for value in args.duts.split(",")):
+        result = run(args, count, registry, mix)
+        results.append(result)
+        print(
+            f"{count:>5} {result['frames_sent']:>9} {result['frames_lost']:>7} "
+            f"{result['lost_pct']:>7.2f} {result['cpu_pct']:>7.1f} "
+            f"{result['cpu_pct_per_dut']:>9.2f} {result['threads']:>7} "
+            f"{result['rss_mb']:>7.1f}"
+        )
+
+    report = {
+        "benchmark": "scale",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "engine": args.engine,
+        "rate": args.rate,
+        "dut_options": dict(option.split("=", 1) for option in args.option),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+            output.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Measure the startup time of the decoder and the command line tools.
+
+Each case runs in a fresh interpreter started from an empty temporary folder,
+so nothing depends on the working directory. The interpreter start-up itself
+(``python -c pass``) is measured too and subtracted. Also measures loading the
+frame formats and DUT configuration through the mtime-keyed cache.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, repo_root)
+
+CASES = {
+    "import frame_decoder": "import radcontrol.frame.frame_decoder",
+    "first decode": (
+        "from radcontrol.frame.frame_decoder import get_decoder_registry\n"
+        "get_decoder_registry().decode(0, bytes(4))"
+    ),
+    "import run_server": "import radcontrol.run_server",
+    "import server": "import radcontrol.host.server",
+}
+
+
+def time_subprocess(code, cwd, runs):
+    env = dict(os.environ, PYTHONPATH=repo_root)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def time_call(function, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cwd:
+        baseline = time_subprocess("pass", cwd, args.runs)
+        print(f"{'python -c pass':>22}: {baseline * 1000:7.1f} ms")
+        for name, code in CASES.items():
+            elapsed = time_subprocess(code, cwd, args.runs) - baseline
+            print(f"{name:>22}: {elapsed * 1000:7.1f} ms above interpreter start")
+
+    from radcontrol.file_manager import load_config
+    from radcontrol.frame.decoder_registry import DecoderRegistry
+    from radcontrol.frame.frame_decoder import DEFAULT_FRAME_FORMAT
+    from radcontrol.utils.config_cache import load_cached
+
+    dut_config = os.path.join(repo_root, "dut_config.yaml")
+    print()
+    for name, path, loader in (
+        ("frame formats", DEFAULT_FRAME_FORMAT, DecoderRegistry.from_yaml),
+        ("DUT config", dut_config, load_config),
+    ):
+        uncached = time_call(lambda: loader(path), args.runs)
+        load_cached(path, loader)
+        cached = time_call(lambda: load_cached(path, loader), args.runs)
+        print(
+            f"{name:>22}: {uncached * 1000:7.2f} ms parsed, "
+            f"{cached * 1e6:7.1f} us cached"
+        )
+
+
+if __name__ == "__main__":
+    main()
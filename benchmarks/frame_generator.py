@@ -0,0 +1,124 @@
+"""
+Synthetic DUT frames following a frame ID formatting file.
+
+Used by the benchmarks to build streams with a chosen mix of frame IDs, CRC
+errors and line noise. Payloads have the length the formatting file gives
+their frame ID, so they decode like real frames.
+"""
+
+import binascii
+import random
+
+
+def build_frame(frame_id, payload, crc_error=False):
+    crc = binascii.crc_hqx(payload, 0xFFFF)
+    if crc_error:
+        crc ^= 0x0001
+    return (
+        bytes([0xAA, frame_id, len(payload)])
+        + payload
+        + crc.to_bytes(2, "big")
+        + b"\x55"
+    )
+
+
+def parse_mix(text):
+    """
+    Parse a frame mix like ``"0:1,2:3"`` (frame ID: weight) into a dict.
+    """
+    mix = {}
+    for item in text.split(","):
+        frame_id, _, weight = item.partition(":")
+        mix[int(frame_id)] = float(weight or 1)
+    return mix
+
+
+class FrameGenerator:
+    """
+    Build frames with random payloads for the frame IDs of a DecoderRegistry.
+
+    The first 4 payload bytes of every frame carry a big-endian sequence
+    number (frame IDs with shorter payloads carry none), so a receiver can
+    match each frame to the time it was sent.
+
+    Args:
+        registry (DecoderRegistry): Gives the frame IDs and payload lengths.
+        mix (dict, optional): Maps frame IDs to relative weights, all frame
+            IDs of the registry equally by default.
+        crc_error_rate (float): Fraction of frames sent with a wrong CRC.
+        noise_ratio (float): Chance of a run of random bytes before a frame.
+        seed (int): Seed of the random generator, streams are reproducible.
+
+    Raises:
+        ValueError: If a frame ID of the mix has no format in the registry.
+    """
+
+    SEQUENCE_BYTES = 4
+
+    def __init__(
+        self, registry, mix=None, crc_error_rate=0.0, noise_ratio=0.0, seed=1234
+    ):
+        if mix is None:
+            mix = {
+                frame_id: 1.0
+                for frame_id in range(len(registry.lengths))
+                if registry.expected_length(frame_id) is not None
+            }
+        for frame_id in mix:
+            if registry.expected_length(frame_id) is None:
+                raise ValueError(f"Frame ID {frame_id} has no format")
+
+        self.registry = registry
+        self.frame_ids = list(mix)
+        self.weights = list(mix.values())
+        self.crc_error_rate = crc_error_rate
+        self.noise_ratio = noise_ratio
+        self.rng = random.Random(seed)
+
+    def frame(self, sequence):
+        """
+        Build one frame carrying a sequence number.
+
+        Returns:
+            tuple: The frame bytes, its frame ID and whether its CRC is wrong.
+        """
+        rng = self.rng
+        frame_id = rng.choices(self.frame_ids, self.weights)[0]
+        length = self.registry.expected_length(frame_id)
+        payload = rng.randbytes(length)
+        if length >= self.SEQUENCE_BYTES:
+            payload = (sequence & 0xFFFFFFFF).to_bytes(
+                self.SEQUENCE_BYTES, "big"
+            ) + payload[self.SEQUENCE_BYTES :]
+        crc_error = rng.random() < self.crc_error_rate
+        return build_frame(frame_id, payload, crc_error), frame_id, crc_error
+
+    def noise(self):
+        """
+        Random bytes to put before the next frame, empty most of the time.
+        """
+        if self.noise_ratio and self.rng.random() < self.noise_ratio:
+            # No header bytes, the noise must not start frames of its own
+            return self.rng.randbytes(self.rng.randint(1, 64)).replace(b"\xaa", b"\x00")
+        return b""
+
+    def chunks(self, frames, chunk_frames):
+        """
+        Build a stream of frames cut into chunks written at once.
+
+        Args:
+            frames (int): Number of frames.
+            chunk_frames (int): Frames per chunk.
+
+        Returns:
+            list: (first sequence number, frame count, bytes) per chunk.
+        """
+        chunks = []
+        for first in range(0, frames, chunk_frames):
+            count = min(chunk_frames, frames - first)
+            parts = []
+            for sequence in range(first, first + count):
+                parts.append(self.noise())
+                parts.append(self.frame(sequence)[0])
+            chunks.append((first, count, b"".join(parts)))
+        return chunks
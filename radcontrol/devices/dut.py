@@ -1,15 +1,47 @@
+import select
 import threading
+import time
+from functools import partial
 import serial
 import socket
 from queue import Queue, Empty
 from radcontrol.utils.logger import Logger
+from radcontrol.utils.capture import CaptureWriter, CAPTURE_FLAG_CRC_ERROR
+from radcontrol.utils.columnar import ColumnarSink
+from radcontrol.utils.repeat_log import RepeatCollapser
+from radcontrol.utils.metrics import DUTMetrics
 from host.log_id import (
     DUT_QUEUE_EMPTY,
     DUT_QUEUE_NORMAL,
     DUT_FRAME_CRC_ERROR,
     MAX_CONSECUTIVE_CRC_ERRORS,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_READ_CHUNK_SIZE,
+    MAX_READ_SIZE,
+    DUT_EXIT_STOPPED,
+    DUT_EXIT_TIMEOUT,
+    DUT_EXIT_CRC_LIMIT,
+    DUT_EXIT_ERROR,
+    CONFIG_IN_PLACE,
+    CONFIG_RECONNECT,
+    CONFIG_POWER_CYCLE,
 )
-from frame.frame_decoder import PacketFrame
+from frame.frame_decoder import PacketFrame, get_decoder_registry
+from frame.frame_extractor import FrameExtractor
+
+# dut_config.yaml fields applied to a running DUT without restarting it
+IN_PLACE_FIELDS = {"timeout", "text_log", "verbose"}
+# Fields that need the DUT to be power cycled
+POWER_FIELDS = {"power_switch_port", "power_port_IP"}
+# Fields that need the frame sinks to be rebuilt
+SINK_FIELDS = {
+    "collapse_repeats",
+    "repeat_flush_interval",
+    "capture_log",
+    "capture_flush_interval",
+    "capture_fsync",
+    "columnar_store",
+}
 
 
 class DUT:
@@ -26,107 +58,209 @@ class DUT:
             PowerSwitchController (PowerSwitchController): Instance of the power
             switch controller.
         """
-        self.config = dut_info
         self.name = dut_info["name"]
+        self.power_controller = PowerSwitchController
+        self.serial = None
+        self.extractor = FrameExtractor()
+
+        self.dut_logger = Logger(
+            mode=self.name,
+            verbose=dut_info.get("verbose", 3),
+            queued=dut_info.get("queued_logging", False),
+        )
+
+        self.config = {}
+        self.repeats = None
+        self.capture = None
+        self.columns = None
+        # Runs capture and columnar writes when set, in submission order. The
+        # AsyncEngine sets one so disk writes never block its event loop
+        self.sink_executor = None
+        self._sink_frames = []  # (frame, capture flags) of the current batch
+        self.apply_config(dut_info)
+
+        self.read_thread = None
+        self.async_task = None  # Set when followed by the AsyncEngine
+        self._stop_event = threading.Event()
+        self.consecutive_crc_errors = 0
+        self.output_queue = Queue()
+
+        # Supervision: notify(event, reason) is called with "ready" on the first
+        # valid frame of a monitoring run and "exit" when the run ends
+        self.notify = None
+        self.exit_reason = None
+        self.ready = False
+        self.last_frame_time = None  # time.monotonic() of the last batch
+        self.metrics = DUTMetrics()
+
+    def apply_config(self, dut_info):
+        """
+        Take over a DUT configuration.
+
+        Only the IN_PLACE_FIELDS may change while the DUT is monitored, other
+        changes must be applied between monitoring runs (see config_action).
+
+        Args:
+            dut_info (dict): Dictionary containing DUT information.
+        """
+        changed = self.changed_fields(dut_info)
+        self.config = dut_info
         self.timeout = dut_info["timeout"]
         self.url = dut_info["url"]
         self.baudrate = dut_info["baudrate"]
         self.power_switch_port = dut_info["power_switch_port"]
         self.power_port_IP = dut_info["power_port_IP"]
+        # A read waits up to read_timeout for data, then takes all that arrived.
+        # Connections that cannot be polled return once read_chunk_size bytes
+        # have arrived or read_timeout expired, whichever comes first
+        self.read_timeout = dut_info.get("read_timeout", DEFAULT_READ_TIMEOUT)
+        self.read_chunk_size = dut_info.get("read_chunk_size", DEFAULT_READ_CHUNK_SIZE)
+        # Frames go to the hex text log and/or to a binary capture file
+        self.text_log = dut_info.get("text_log", True)
+
+        if "verbose" in changed:
+            self.dut_logger.set_verbose(dut_info.get("verbose", 3))
+        if changed & SINK_FIELDS:
+            self.close_sinks()
+            self.setup_sinks()
+
+    def setup_sinks(self):
+        dut_info = self.config
+        # Runs of identical frames can be collapsed into repeat records
+        self.repeats = None
+        if dut_info.get("collapse_repeats", False):
+            self.repeats = RepeatCollapser(
+                flush_interval=dut_info.get("repeat_flush_interval", 60.0)
+            )
+        self.capture = None
+        if dut_info.get("capture_log", False):
+            self.capture = CaptureWriter(
+                self.name,
+                rotate_interval=self.dut_logger.log_rotate_interval,
+                flush_interval=dut_info.get("capture_flush_interval", 1.0),
+                fsync=dut_info.get("capture_fsync", False),
+            )
+        # Decoded payloads can additionally be stored per frame ID for analysis
+        self.columns = None
+        if dut_info.get("columnar_store", False):
+            self.columns = ColumnarSink(self.name, get_decoder_registry())
 
-        self.power_controller = PowerSwitchController
-        self.serial = None
-        self.buffer = bytearray()
+    def changed_fields(self, dut_info):
+        """
+        Names of the fields differing between the current configuration and
+        dut_info.
+        """
+        return {
+            key
+            for key in self.config.keys() | dut_info.keys()
+            if self.config.get(key) != dut_info.get(key)
+        }
 
-        self.dut_logger = Logger(mode=self.name, verbose=3)
+    def config_action(self, dut_info):
+        """
+        Tell what applying a new configuration to the running DUT takes.
 
-        self.read_thread = None
-        self._stop_event = threading.Event()
-        self.output_queue = Queue()
+        Args:
+            dut_info (dict): The new DUT information.
+
+        Returns:
+            tuple: CONFIG_IN_PLACE, CONFIG_RECONNECT or CONFIG_POWER_CYCLE, and
+            the set of changed fields.
+        """
+        changed = self.changed_fields(dut_info)
+        if changed & POWER_FIELDS:
+            return CONFIG_POWER_CYCLE, changed
+        if changed - IN_PLACE_FIELDS:
+            return CONFIG_RECONNECT, changed
+        return CONFIG_IN_PLACE, changed
 
     def read(self):
         """
         Read data from the serial device and put it into the output queue.
-        """
-        # Setup threadlock and serial interface
-        self._stop_event.clear()
 
+        However the reader ends, it sets the exit reason first and then wakes
+        the monitor, which reports that reason instead of waiting for its
+        timeout.
+        """
         try:
-            self.serial = serial.serial_for_url(self.url, baudrate=self.baudrate)
+            self.read_connection()
+        except (OSError, serial.SerialException) as e:
+            if not self._stop_event.is_set():  # Not closed by stop
+                self.dut_logger.dataLogger.error(f"Serial error occurred: {e}")
+                self.set_exit_reason(DUT_EXIT_ERROR)
+        except Exception:
+            self.set_exit_reason(DUT_EXIT_ERROR)
+            raise
+        finally:
+            # Free up hardware interface for later connection
+            if self.serial:
+                self.serial.__del__()
+                self.serial = None
+            self._stop_event.set()
+            self.output_queue.put([])  # Wake up the monitor waiting for frames
+
+    def read_connection(self):
+        # The stop event is cleared by the server before a run, never here: a
+        # stop requested before the reader started must hold
+        try:
+            self.serial = serial.serial_for_url(
+                self.url, baudrate=self.baudrate, timeout=self.read_timeout
+            )
         except socket.timeout:
             self.dut_logger.dataLogger.error(
                 f"Connection timed out. No device connected."
             )
+            self.set_exit_reason(DUT_EXIT_ERROR)
             return
 
         except serial.SerialException as e:
             self.dut_logger.dataLogger.error(f"Serial error occurred: {e}")
+            self.set_exit_reason(DUT_EXIT_ERROR)
             return
+        self.metrics.connections += 1
 
         # Handle any other serial-related errors
         self.serial.flushInput()
         self.serial.flushOutput()
 
-        while not self._stop_event.is_set():
-            data = self.serial.read(self.serial.in_waiting)
-            self.buffer.extend(data)
-            self.process_buffer(self.output_queue)
-
-        # Free up hardware interface for later connection
-        self.serial.__del__()
-        self.serial = None
+        try:
+            fd = self.serial.fileno()
+        except (AttributeError, OSError):
+            fd = None  # e.g. loop://, read with the port timeout instead
+        if fd is not None:
+            self.serial.timeout = 0  # Reads only take what already arrived
 
-    def process_buffer(self, output_queue):
-        counter = 0
-        while True:
-            if len(self.buffer) < 6:  # Minimum length for a valid frame
-                break
-
-            header = self.buffer[0:1]
-            if not self.is_valid_header(header):
-                self.buffer.pop(0)
-                counter += 1
+        while not self._stop_event.is_set():
+            if fd is None:
+                data = self.serial.read(self.read_chunk_size)
+            elif select.select([fd], [], [], self.read_timeout)[0]:
+                # Everything that arrived since the last read, in one call
+                data = self.serial.read(MAX_READ_SIZE)
+            else:
                 continue
-
-            if (
-                len(self.buffer) < 3
-            ):  # Need at least header, frame_id, and payload_length
-                break
-
-            payload_length = self.buffer[2]
-
-            total_length = 1 + 1 + 1 + payload_length + 2 + 1
-            if len(self.buffer) < total_length:
-                break
-
-            full_message = self.buffer[:total_length]
-
-            tail = full_message[-1:]
-            if not self.is_valid_tail(tail):
-                self.buffer.pop(0)
+            if not data:
                 continue
+            self.metrics.bytes_read += len(data)
+            self.extractor.feed(data)
+            self.process_buffer(self.output_queue)
 
-            self.process_message(full_message, output_queue)
-            self.buffer = self.buffer[total_length:]
+    def process_buffer(self, output_queue):
+        # Hand every frame of this read over at once, one queue operation per
+        # read instead of one per frame
+        batch = [self.build_packet(message) for message in self.extractor.frames()]
+        if batch:
+            output_queue.put(batch)
+        self.log_discarded()
+
+    def log_discarded(self):
+        counter = self.extractor.pop_discarded()
         if counter > 0:
+            self.metrics.resync_bytes += counter
             self.dut_logger.dataLogger.error(f"Bytes were popped {counter}")
 
-    def is_valid_header(self, header):
-        return header == b"\xaa"
-
-    def is_valid_tail(self, tail):
-        return tail == b"\x55"
-
-    def process_message(self, message, output_queue):
-        header = message[0:1]
-        frame_id = message[1:2]
-        payload_length = message[2]
-        payload = message[3 : 3 + payload_length]
-        crc_bytes = message[3 + payload_length : 3 + payload_length + 2]
-        tail = message[-1:]
-
-        packet = PacketFrame(header, frame_id, payload_length, payload, crc_bytes, tail)
-        output_queue.put(packet)
+    def build_packet(self, message):
+        # The extractor hands out views into its buffer, keep an owned copy
+        return PacketFrame.from_bytes(bytes(message))
 
     def print_to_log(self, data, format_type, level="debug"):
         """
@@ -144,69 +278,221 @@ class DUT:
         Monitor the DUT by starting a read thread and handling power cycles.
         """
 
+        # Before the reader starts, a failed open must keep its exit reason
+        self.reset_run_state()
+
         self.read_thread = threading.Thread(target=self.read, daemon=True)
         self.read_thread.start()
 
         self.dut_logger.dataLogger.warning(f"Monitor started")
 
-        consecutive_crc_errors = 0
-
         try:
             while not self._stop_event.is_set():
-                data, error_code = self.get_data(
+                batch, error_code = self.get_batch(
                     timeout=self.timeout
                 )  # Adjust timeout as needed
-                if data:
-                    if error_code == DUT_QUEUE_NORMAL:
-                        self.print_to_log(data, format_type="hex")
-                        consecutive_crc_errors = 0
-                        continue
-                    elif error_code == DUT_FRAME_CRC_ERROR:
-                        self.print_to_log(data, format_type="hex", level="error")
-                        consecutive_crc_errors += 1  # Increment counter on CRC error
-                        if consecutive_crc_errors >= MAX_CONSECUTIVE_CRC_ERRORS:
-                            self.dut_logger.consoleLogger.error(
-                                f"More than {MAX_CONSECUTIVE_CRC_ERRORS} consecutive CRC errors, stopping monitor."
-                            )
-                            break
-                        continue
-                elif error_code == DUT_QUEUE_EMPTY:
-                    self.dut_logger.consoleLogger.error(f"Timeout on the transmission")
+                if not self.handle_batch(batch, error_code):
                     break
-
+        except Exception:
+            self.set_exit_reason(DUT_EXIT_ERROR)
+            raise
         finally:
+            self.close_sinks()
             self.stop()  # seppuku
+            self.report_exit()
+
+    def reset_run_state(self):
+        # Called by both engines before a run reads anything: frames and
+        # partial bytes left by the previous run must not count for this one
+        self.extractor.clear()
+        try:
+            while True:
+                self.output_queue.get_nowait()
+        except Empty:
+            pass
+        self.consecutive_crc_errors = 0
+        self.exit_reason = None
+        self.ready = False
+
+    def set_exit_reason(self, reason):
+        # The first reason wins, e.g. a lost connection also ends in a timeout
+        if self.exit_reason is None:
+            self.exit_reason = reason
+
+    def report_exit(self):
+        if self.notify:
+            self.notify("exit", self.exit_reason or DUT_EXIT_STOPPED)
+
+    def handle_batch(self, batch, error_code):
+        """
+        Check and log every frame of a batch.
+
+        Args:
+            batch (list): Frames received from the DUT, empty on timeout.
+            error_code (int): Result of the queue read.
+
+        Returns:
+            bool: False if the monitor has to stop.
+        """
+        if error_code == DUT_QUEUE_EMPTY:
+            return self.handle_data(None, error_code)
+        if not batch:
+            return True  # Woken up by stop or by the end of the reader
+        self.last_frame_time = time.monotonic()
+        self.metrics.frames += len(batch)
+        try:
+            for data in batch:
+                if not self.handle_data(data, self.check_data(data)):
+                    return False
+            return True
+        finally:
+            self.write_sinks()
+
+    def write_sinks(self):
+        """
+        Write the frames of the current batch to the capture file and the
+        columnar store, stamped with the time the batch was handled.
+        """
+        if not self._sink_frames:
+            return
+        frames, self._sink_frames = self._sink_frames, []
+        self.run_sink_job(
+            partial(
+                write_frames,
+                frames,
+                self.capture,
+                self.columns,
+                time.monotonic_ns(),
+                time.time(),
+            )
+        )
+
+    def run_sink_job(self, job):
+        if self.sink_executor is None:
+            job()
+            return
+        self.sink_executor.submit(job).add_done_callback(self.log_sink_error)
 
-    def get_data(self, timeout=None):
+    def log_sink_error(self, future):
+        error = future.exception()
+        if error is not None:
+            self.dut_logger.dataLogger.error(f"Frame sink write failed: {error}")
+
+    def handle_data(self, data, error_code):
         """
-        Get data from the output queue with an optional timeout.
+        Log a frame received from the DUT and decide whether monitoring goes on.
+
+        Args:
+            data (PacketFrame): The received frame, None on timeout.
+            error_code (int): Result of the frame check or queue read.
+
+        Returns:
+            bool: False if the monitor has to stop.
+        """
+        if data:
+            if error_code == DUT_QUEUE_NORMAL:
+                if self.capture or self.columns:
+                    self._sink_frames.append((data, 0))
+                if self.text_log:
+                    if self.repeats:
+                        self.log_repeats(data)
+                    else:
+                        self.print_to_log(data, format_type="hex")
+                self.consecutive_crc_errors = 0
+                if not self.ready:
+                    self.ready = True
+                    if self.notify:
+                        self.notify("ready", None)
+            elif error_code == DUT_FRAME_CRC_ERROR:
+                if self.capture:
+                    self._sink_frames.append((data, CAPTURE_FLAG_CRC_ERROR))
+                # CRC errors always reach the text log, even with text_log off
+                self.print_to_log(data, format_type="hex", level="error")
+                self.metrics.crc_errors += 1
+                self.consecutive_crc_errors += 1  # Increment counter on CRC error
+                if self.consecutive_crc_errors >= MAX_CONSECUTIVE_CRC_ERRORS:
+                    self.dut_logger.consoleLogger.error(
+                        f"More than {MAX_CONSECUTIVE_CRC_ERRORS} consecutive CRC errors, stopping monitor."
+                    )
+                    self.set_exit_reason(DUT_EXIT_CRC_LIMIT)
+                    return False
+        elif error_code == DUT_QUEUE_EMPTY:
+            self.dut_logger.consoleLogger.error(f"Timeout on the transmission")
+            self.metrics.timeouts += 1
+            self.set_exit_reason(DUT_EXIT_TIMEOUT)
+            return False
+        return True
+
+    def log_repeats(self, data):
+        for message in self.repeats.feed(data.to_bytes(), time.time()):
+            self.dut_logger.dataLogger.debug(message)
+
+    def get_batch(self, timeout=None):
+        """
+        Get all frames waiting in the output queue, blocking up to timeout for
+        the first ones.
 
         Args:
             timeout (int, optional): Time to wait for data before raising Empty exception.
 
         Returns:
-            tuple: Data read from the queue and error code.
+            tuple: List of frames read from the queue and error code.
         """
         try:
-            data = self.output_queue.get(timeout=timeout)
-            # This is where I parse the data package and check for transmission errors
-            if data.check_crc() == True:
-                error_code = (
-                    DUT_QUEUE_NORMAL  # Placeholder for actual error code parsing
-                )
-            else:
-                error_code = (
-                    DUT_FRAME_CRC_ERROR  # Placeholder for actual error code parsing
-                )
-            return data, error_code
+            batch = self.output_queue.get(timeout=timeout)
+        except Empty:
+            return [], DUT_QUEUE_EMPTY
+
+        # Drain whatever the reader queued meanwhile in the same wake-up
+        try:
+            while True:
+                batch.extend(self.output_queue.get_nowait())
         except Empty:
-            return None, DUT_QUEUE_EMPTY
+            pass
+        return batch, DUT_QUEUE_NORMAL
+
+    def check_data(self, data):
+        """
+        Check a frame for transmission errors.
+
+        Args:
+            data (PacketFrame): The frame to check.
+
+        Returns:
+            int: DUT_QUEUE_NORMAL or DUT_FRAME_CRC_ERROR.
+        """
+        # This is where I parse the data package and check for transmission errors
+        if data.check_crc() == True:
+            return DUT_QUEUE_NORMAL  # Placeholder for actual error code parsing
+        return DUT_FRAME_CRC_ERROR  # Placeholder for actual error code parsing
+
+    def close_sinks(self):
+        """
+        Write pending repeat records, flush and close the capture file and
+        columnar store, the next monitoring run starts new files. Called from
+        the monitoring thread, or the event loop, so it never races with a
+        write; with a sink_executor the files are closed there, after the
+        writes queued before.
+        """
+        if self.repeats:
+            for message in self.repeats.flush():
+                self.dut_logger.dataLogger.debug(message)
+        self.write_sinks()
+        if self.capture:
+            self.run_sink_job(self.capture.close)
+        if self.columns:
+            self.run_sink_job(self.columns.close)
 
     def stop(self):
         """
         Stop the DUT monitoring, clean up the thread and serial device.
         """
+        self.set_exit_reason(DUT_EXIT_STOPPED)
         self._stop_event.set()
+        if self.async_task:
+            self.async_task.cancel()
+        else:
+            self.output_queue.put([])  # Wake up the monitor waiting for frames
         if self.read_thread and self.read_thread.is_alive():
             self.read_thread.join(timeout=1)
         if self.serial:
@@ -221,3 +507,15 @@ class DUT:
     #         int: The thread ID.
     #     """
     #     return ctypes.CDLL("libc.so.6").syscall(186)
+
+
+def write_frames(frames, capture, columns, monotonic_ns, wall_time):
+    """
+    Write frames to a capture file and a columnar store, either may be None.
+    Frames with a CRC error only go to the capture file.
+    """
+    for data, flags in frames:
+        if capture:
+            capture.write(data.to_bytes(), flags, monotonic_ns)
+        if columns and not flags & CAPTURE_FLAG_CRC_ERROR:
+            columns.write(data.frame_id[0], data.payload, wall_time)
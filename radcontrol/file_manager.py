@@ -1,6 +1,7 @@
 import sys
 import yaml
 import subprocess
+from radcontrol.utils.config_cache import load_cached
 
 
 def open_tmux_window():
@@ -45,7 +46,8 @@ def add_arguments_from_config(parser, config):
 
 
 def get_dut_info(config_file):
-    config = load_config(config_file)
+    # Parsed again only when the file changed since the last call
+    config = load_cached(config_file, load_config)
 
     uart_info = {
         "number_connected_uarts": len(config),
@@ -0,0 +1,66 @@
+from binascii import crc_hqx
+from .frame_extractor import FrameExtractor
+
+# CRC-16/CCITT-FALSE: poly 0x1021, init 0xFFFF, no reflection, no final xor.
+# binascii.crc_hqx implements exactly this polynomial in C, seeded with init.
+INITIAL_REMAINDER = 0xFFFF
+
+
+def crc16(data, remainder=INITIAL_REMAINDER):
+    """
+    Compute the CRC-16/CCITT-FALSE of a bytes-like object in one native call.
+
+    Args:
+        data (bytes-like): Data to compute the CRC of.
+        remainder (int): Initial remainder, pass a previous result to continue.
+
+    Returns:
+        int: The 16 bit CRC.
+    """
+    return crc_hqx(data, remainder)
+
+
+def check_frame_crc(frame):
+    """
+    Validate the CRC of a full frame (header to tail).
+
+    The CRC is transmitted big-endian right after the payload, so running the
+    CRC over payload and CRC bytes together yields zero for an intact frame.
+
+    Args:
+        frame (bytes-like): Complete frame, header and tail included.
+
+    Returns:
+        bool: True if the CRC matches the payload.
+    """
+    with memoryview(frame) as view:
+        return crc_hqx(view[3:-1], INITIAL_REMAINDER) == 0
+
+
+def check_crc_batch(frames):
+    """
+    Validate the CRC of a list of full frames.
+
+    Args:
+        frames (iterable): Complete frames as bytes-like objects.
+
+    Returns:
+        list: One bool per frame, True if its CRC matches.
+    """
+    return [crc_hqx(frame[3:-1], INITIAL_REMAINDER) == 0 for frame in frames]
+
+
+def check_crc_buffer(buffer):
+    """
+    Find and validate every frame in a raw capture buffer.
+
+    Args:
+        buffer (bytes-like): Bytes as received from the DUT, noise included.
+
+    Returns:
+        list: A (frame, valid) tuple per frame found, frame being bytes.
+    """
+    extractor = FrameExtractor()
+    extractor.feed(buffer)
+    frames = [bytes(view) for view in extractor.frames()]
+    return list(zip(frames, check_crc_batch(frames)))
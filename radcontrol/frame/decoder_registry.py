@@ -0,0 +1,137 @@
+import struct
+
+FRAME_ID_SLOTS = 256  # frame_id is a single byte
+
+# YAML loader refusing duplicate keys, built on first use so importing the
+# registry does not import yaml
+_unique_key_loader = None
+
+
+def _get_unique_key_loader():
+    global _unique_key_loader
+    if _unique_key_loader is not None:
+        return _unique_key_loader
+    import yaml
+
+    class _UniqueKeyLoader(yaml.SafeLoader):
+        """
+        YAML loader refusing duplicate mapping keys instead of keeping the last one.
+        """
+
+        def construct_mapping(self, node, deep=False):
+            keys = set()
+            for key_node, _ in node.value:
+                key = self.construct_object(key_node, deep=deep)
+                if key in keys:
+                    raise yaml.constructor.ConstructorError(
+                        None,
+                        None,
+                        f"duplicate key {key!r}",
+                        key_node.start_mark,
+                    )
+                keys.add(key)
+            return super().construct_mapping(node, deep)
+
+    _unique_key_loader = _UniqueKeyLoader
+    return _unique_key_loader
+
+
+class DecoderRegistry:
+    """
+    Payload decoders indexed by frame ID.
+
+    Holds one precompiled struct.Struct and the expected payload length per
+    frame ID in 256-slot lists, so decoding a frame is a list lookup followed
+    by a single unpack.
+
+    Args:
+        formats (dict): Maps frame IDs (0-255) to struct format strings.
+
+    Raises:
+        ValueError: If a frame ID is out of range or a format is invalid.
+    """
+
+    def __init__(self, formats):
+        self.formats = [None] * FRAME_ID_SLOTS
+        self.structs = [None] * FRAME_ID_SLOTS
+        self.lengths = [None] * FRAME_ID_SLOTS
+
+        for frame_id, format_str in formats.items():
+            if not isinstance(frame_id, int) or not 0 <= frame_id < FRAME_ID_SLOTS:
+                raise ValueError(f"Invalid frame ID {frame_id!r}, expected 0-255")
+            try:
+                compiled = struct.Struct(format_str)
+            except (struct.error, TypeError) as e:
+                raise ValueError(
+                    f"Invalid format {format_str!r} for frame ID {frame_id}: {e}"
+                )
+            self.formats[frame_id] = format_str
+            self.structs[frame_id] = compiled
+            self.lengths[frame_id] = compiled.size
+
+    @classmethod
+    def from_yaml(cls, config_file):
+        """
+        Build the registry from a frame_id_formatting YAML file.
+
+        Entries are keyed by frame ID (``3: "IIIIBBBB"``). Files using the
+        former format-string keys are accepted as long as no format repeats,
+        since repeated keys would silently drop frame IDs.
+
+        Args:
+            config_file (str): Path to the YAML file.
+
+        Returns:
+            DecoderRegistry: The compiled registry.
+
+        Raises:
+            ValueError: If the file holds duplicate keys or invalid entries.
+        """
+        import yaml
+
+        with open(config_file, "r") as file:
+            try:
+                config = yaml.load(file, Loader=_get_unique_key_loader())
+            except yaml.constructor.ConstructorError as e:
+                raise ValueError(f"{config_file}: {e}")
+
+        formats = {}
+        for key, value in config["frame_id_formatting"].items():
+            if isinstance(key, str) and isinstance(value, int):
+                key, value = value, key  # Former "format: frame_id" layout
+            if key in formats:
+                raise ValueError(f"{config_file}: frame ID {key} defined twice")
+            formats[key] = value
+
+        return cls(formats)
+
+    def expected_length(self, frame_id):
+        """
+        Payload length of a frame ID, None if it has no format.
+        """
+        return self.lengths[frame_id]
+
+    def decode(self, frame_id, payload):
+        """
+        Unpack a payload with the format of its frame ID.
+
+        Args:
+            frame_id (int): The frame ID.
+            payload (bytes-like): The frame payload.
+
+        Returns:
+            tuple: The unpacked values.
+
+        Raises:
+            ValueError: If the frame ID has no format or the payload length
+            does not match it.
+        """
+        compiled = self.structs[frame_id]
+        if compiled is None:
+            raise ValueError(f"No format string found for frame ID {frame_id}")
+        if len(payload) != compiled.size:
+            raise ValueError(
+                f"Payload of {len(payload)} bytes for frame ID {frame_id}, "
+                f"format {self.formats[frame_id]} expects {compiled.size}"
+            )
+        return compiled.unpack(payload)
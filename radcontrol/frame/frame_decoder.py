@@ -1,24 +1,126 @@
-import struct
-import yaml
-from .crc_table import crcTable
+import os
+from .crc import crc16
+from .decoder_registry import DecoderRegistry
+from radcontrol.utils.config_cache import load_cached
 
-# Load the frame_id_formatting from YAML file
-with open("frame_id_formatting.yaml", "r") as file:
-    config = yaml.safe_load(file)
-    frame_id_formatting = config["frame_id_formatting"]
+# frame_id_formatting.yaml shipped next to this module, whatever the working
+# directory or the way the package was installed
+DEFAULT_FRAME_FORMAT = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "frame_id_formatting.yaml"
+)
+_frame_format = DEFAULT_FRAME_FORMAT
+
+
+def set_frame_format(path):
+    """
+    Use another frame_id_formatting file for decoding.
+    """
+    global _frame_format
+    _frame_format = os.path.abspath(path)
+
+
+def get_decoder_registry():
+    """
+    Return the DecoderRegistry compiled from the frame_id_formatting file.
+
+    The file is compiled on first use and again only after it changes.
+    """
+    return load_cached(_frame_format, DecoderRegistry.from_yaml)
 
 
 class PacketFrame:
+    """
+    A frame received from a DUT.
+
+    The frame is stored as a single immutable buffer and an offset into it. The
+    fields are sliced out lazily on access, so building a frame costs one small
+    object and no copies:
+
+        header          1 byte      (offset)
+        frame_id        1 byte      (offset + 1)
+        payload_length  1 byte      (offset + 2)
+        payload         N bytes     (offset + 3)
+        crc_bytes       2 bytes     (offset + 3 + N)
+        tail            1 byte      (offset + 5 + N)
+    """
+
+    __slots__ = ("_raw", "_offset")
+
     def __init__(self, header, frame_id, payload_length, payload, crc_bytes, tail):
-        self.header = header  # 1 byte
-        self.frame_id = frame_id  # 1 byte
-        self.payload_length = payload_length  # 1 byte
-        self.payload = payload  # N bytes
-        self.crc_bytes = crc_bytes  # 2 bytes
-        self.tail = tail  # 1 byte
+        self._raw = b"".join(
+            (
+                bytes(header),
+                bytes(frame_id),
+                bytes((payload_length,)),
+                bytes(payload),
+                bytes(crc_bytes),
+                bytes(tail),
+            )
+        )
+        self._offset = 0
+
+    @classmethod
+    def from_bytes(cls, raw, offset=0):
+        """
+        Wrap a complete frame without copying it.
+
+        Args:
+            raw (bytes): Buffer holding the frame, header to tail.
+            offset (int): Position of the frame header in raw.
+
+        Returns:
+            PacketFrame: The frame.
+        """
+        frame = cls.__new__(cls)
+        frame._raw = raw
+        frame._offset = offset
+        return frame
+
+    @property
+    def header(self):
+        return self._raw[self._offset : self._offset + 1]
+
+    @property
+    def frame_id(self):
+        return self._raw[self._offset + 1 : self._offset + 2]
+
+    @property
+    def payload_length(self):
+        return self._raw[self._offset + 2]
+
+    @property
+    def payload(self):
+        start = self._offset + 3
+        return self._raw[start : start + self._raw[self._offset + 2]]
+
+    @property
+    def crc_bytes(self):
+        start = self._offset + 3 + self._raw[self._offset + 2]
+        return self._raw[start : start + 2]
+
+    @property
+    def crc(self):
+        start = self._offset + 3 + self._raw[self._offset + 2]
+        return (self._raw[start] << 8) | self._raw[start + 1]
+
+    @property
+    def tail(self):
+        start = self._offset + 5 + self._raw[self._offset + 2]
+        return self._raw[start : start + 1]
+
+    def __len__(self):
+        return self._raw[self._offset + 2] + 6
+
+    def to_bytes(self):
+        """
+        Return the complete frame, header to tail.
+        """
+        if self._offset == 0 and len(self._raw) == len(self):
+            return self._raw
+        return self._raw[self._offset : self._offset + len(self)]
 
     def to_hex(self, byte_array):
-        return "".join(f"{byte:02x}" for byte in byte_array)
+        return byte_array.hex()
 
     def format_default(self):
         return (
@@ -28,56 +130,16 @@ class PacketFrame:
         )
 
     def format_hex(self):
-        header_str = self.to_hex(self.header)
-        frame_id_str = self.to_hex(self.frame_id)
-        payload_length_str = f"{self.payload_length:02x}"
-        payload_str = self.to_hex(self.payload)
-        crc_bytes_str = self.to_hex(self.crc_bytes)
-        tail_str = self.to_hex(self.tail)
-
-        return f"{header_str}{frame_id_str}{payload_length_str}{payload_str}{crc_bytes_str}{tail_str}"
+        return self.to_bytes().hex()
 
     def parse_payload(self):
-        frame_id_int = int.from_bytes(self.frame_id, byteorder="big")
-        format_str = None
-        unpacked_data = ()
-
-        for fmt_str, id in frame_id_formatting.items():
-            if id == frame_id_int:
-                format_str = fmt_str
-                break
-
-        if format_str is None:
-            raise ValueError(f"No format string found for frame ID {frame_id_int}")
-
-        try:
-            unpacked_data = struct.unpack(format_str, self.payload)
-        except struct.error as e:
-            print(
-                f"Error unpacking data with format {format_str}: {e}, data {self.payload}"
-            )
-
-        return unpacked_data
-
-    def check_crc(
-        self,
-    ):
-
-        # Concatenating the CRC bytes into a single number
-        # Assuming CRC is in big-endian format
-        crc = (self.crc_bytes[0] << 8) | self.crc_bytes[1]
-
-        # Converting payload to hex representation
-        payload_hex = [hex(byte) for byte in self.payload]
-        INITIAL_REMAINDER = 0xFFFF
-        FINAL_XOR_VALUE = 0x0000
-        remainder = INITIAL_REMAINDER
-
-        for byte in range(self.payload_length):
-            data = self.payload[byte] ^ (remainder >> (16 - 8))
-            remainder = crcTable[data] ^ (remainder << 8) & 0xFFFF
+        return get_decoder_registry().decode(self._raw[self._offset + 1], self.payload)
 
-        return crc == (remainder ^ FINAL_XOR_VALUE)
+    def check_crc(self):
+        # The CRC is sent big-endian after the payload, so the CRC over payload
+        # and CRC bytes together is zero for an intact frame
+        start = self._offset + 3
+        return crc16(self._raw[start : start + self._raw[start - 1] + 2]) == 0
 
     def get_log_message(self, format_type="default"):
         if format_type == "hex":
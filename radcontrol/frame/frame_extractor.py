@@ -0,0 +1,121 @@
+FRAME_HEADER = b"\xaa"
+FRAME_TAIL = 0x55
+
+# header + frame_id + payload_length + crc (2 bytes) + tail
+FRAME_OVERHEAD = 6
+
+
+class FrameExtractor:
+    """
+    Cursor-based frame extractor working on a single reusable buffer.
+
+    Incoming bytes are appended to an internal bytearray and a read cursor marks
+    where the next unparsed byte is. Headers are located with ``bytearray.find``
+    instead of dropping garbage one byte at a time, and consumed bytes are only
+    removed from the buffer when compaction is worthwhile.
+
+    Frames are handed out as memoryview slices of the internal buffer. A view is
+    released as soon as the next frame is requested, copy it with
+    ``bytes(view)`` if it has to outlive the iteration step.
+
+    Args:
+        compact_threshold (int): Number of consumed bytes after which the buffer
+            is compacted, even if unparsed data is still pending.
+    """
+
+    def __init__(self, compact_threshold=64 * 1024):
+        self.compact_threshold = compact_threshold
+        self.discarded = 0  # Bytes dropped while resynchronizing since last reset
+
+        self._buffer = bytearray()
+        self._cursor = 0
+
+    def __len__(self):
+        """
+        Number of bytes received but not parsed yet.
+        """
+        return len(self._buffer) - self._cursor
+
+    def feed(self, data):
+        """
+        Append received bytes to the buffer.
+
+        Args:
+            data (bytes-like): Bytes read from the device.
+        """
+        self._compact()
+        self._buffer += data
+
+    def frames(self):
+        """
+        Yield every complete frame currently in the buffer.
+
+        Yields:
+            memoryview: Slice of the internal buffer holding one full frame,
+            header and tail included.
+        """
+        buffer = self._buffer
+        end = len(buffer)
+        cursor = self._cursor
+
+        with memoryview(buffer) as view:
+            while end - cursor >= FRAME_OVERHEAD:
+                start = buffer.find(FRAME_HEADER, cursor)
+                if start < 0:
+                    self.discarded += end - cursor
+                    cursor = end
+                    break
+                self.discarded += start - cursor
+                cursor = start
+
+                if end - start < FRAME_OVERHEAD:
+                    break
+
+                total_length = buffer[start + 2] + FRAME_OVERHEAD
+                if end - start < total_length:
+                    break
+
+                if buffer[start + total_length - 1] != FRAME_TAIL:
+                    # False header, resynchronize on the next candidate
+                    self.discarded += 1
+                    cursor = start + 1
+                    continue
+
+                cursor = start + total_length
+                self._cursor = cursor
+                frame = view[start:cursor]
+                try:
+                    yield frame
+                finally:
+                    frame.release()
+
+        self._cursor = cursor
+
+    def pop_discarded(self):
+        """
+        Return the number of bytes dropped while resynchronizing and reset it.
+        """
+        discarded = self.discarded
+        self.discarded = 0
+        return discarded
+
+    def clear(self):
+        """
+        Drop all buffered data.
+        """
+        del self._buffer[:]
+        self._cursor = 0
+
+    def _compact(self):
+        """
+        Remove consumed bytes from the front of the buffer when worthwhile.
+        """
+        cursor = self._cursor
+        if cursor == 0:
+            return
+        if cursor == len(self._buffer):
+            del self._buffer[:]
+            self._cursor = 0
+        elif cursor >= self.compact_threshold:
+            del self._buffer[:cursor]
+            self._cursor = 0
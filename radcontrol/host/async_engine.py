@@ -0,0 +1,228 @@
+import asyncio
+import threading
+import serial
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from host.log_id import (
+    DUT_QUEUE_EMPTY,
+    DUT_QUEUE_NORMAL,
+    DUT_EXIT_ERROR,
+    MAX_READ_SIZE,
+)
+
+
+class DUTTask:
+    """
+    Handle on a DUT followed by the AsyncEngine.
+
+    Mimics the part of the threading.Thread interface used by the Server, so
+    both engines can be tracked the same way.
+    """
+
+    def __init__(self, name, loop):
+        self.name = name
+        self.loop = loop
+        self.task = None  # The asyncio.Task, created on the loop
+        self._done = threading.Event()
+
+    def is_alive(self):
+        return not self._done.is_set()
+
+    def join(self, timeout=None):
+        self._done.wait(timeout)
+
+    def cancel(self):
+        """
+        Stop following the DUT, the connection is closed from the event loop.
+        """
+        self.loop.call_soon_threadsafe(self._cancel)
+
+    def _cancel(self):
+        if self.task:
+            self.task.cancel()
+
+    def _start(self, coroutine):
+        # Done once the coroutine finished, or was cancelled before it started
+        # and never ran its cleanup. The run_coroutine_threadsafe future would
+        # be done as soon as cancelled, while the coroutine still cleans up.
+        self.task = self.loop.create_task(coroutine)
+        self.task.add_done_callback(lambda _: self._done.set())
+
+
+class _SocketStream:
+    """
+    Non-blocking reader for socket:// URLs.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def read(self):
+        return await self.reader.read(MAX_READ_SIZE)
+
+    def close(self):
+        self.writer.close()
+
+
+class _SerialStream:
+    """
+    Non-blocking reader for ttys and the other pyserial URL handlers.
+
+    The port is opened with timeout=0 and the loop is woken up through its file
+    descriptor. Handlers without one are polled every ``poll_interval`` seconds.
+    """
+
+    def __init__(self, loop, port, poll_interval):
+        self.loop = loop
+        self.port = port
+        self.poll_interval = poll_interval
+        try:
+            self.fd = port.fileno()
+        except (AttributeError, OSError):
+            self.fd = None
+
+    async def read(self):
+        while True:
+            data = self.port.read(MAX_READ_SIZE)
+            if data:
+                return data
+            if self.fd is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            readable = self.loop.create_future()
+            self.loop.add_reader(
+                self.fd, lambda: readable.done() or readable.set_result(None)
+            )
+            try:
+                await readable
+            finally:
+                self.loop.remove_reader(self.fd)
+
+    def close(self):
+        self.port.close()
+
+
+class AsyncEngine:
+    """
+    Follow every DUT from a single asyncio event loop.
+
+    The thread engine costs two OS threads per DUT (DUT.monitor and DUT.read)
+    talking through a queue. Here each DUT is a task on one loop running in a
+    background thread: reads are non-blocking, frames are parsed, CRC checked
+    and logged as soon as they arrive, and the DUT timeout is enforced with
+    the loop's timers. Frame handling is shared with the thread engine through
+    DUT.build_packet and DUT.handle_batch. The DUT logs are written by the
+    QueuedLogWriter thread and the capture files and columnar stores by a
+    sink thread shared by the DUTs, never from the loop.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        # One thread keeps the sink writes of each DUT in order
+        self.sink_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sinks"
+        )
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def start_dut(self, dut):
+        """
+        Start following a DUT.
+
+        Args:
+            dut (DUT): The DUT to follow.
+
+        Returns:
+            DUTTask: Thread-like handle, alive until the DUT monitoring stops.
+        """
+        # Logging on the loop thread would block every DUT on file and console
+        # writes, the shared writer thread does them instead
+        dut.dut_logger.queue_handlers()
+        dut.sink_executor = self.sink_executor
+        task = DUTTask(dut.name, self.loop)
+        dut.async_task = task
+        self.loop.call_soon_threadsafe(task._start, self._follow(dut))
+        return task
+
+    async def _open(self, dut):
+        url = urlsplit(dut.url)
+        if url.scheme == "socket":
+            reader, writer = await asyncio.open_connection(url.hostname, url.port)
+            return _SocketStream(reader, writer)
+
+        port = serial.serial_for_url(dut.url, baudrate=dut.baudrate, timeout=0)
+        port.reset_input_buffer()
+        port.reset_output_buffer()
+        return _SerialStream(self.loop, port, dut.read_timeout)
+
+    async def _follow(self, dut):
+        logger = dut.dut_logger
+        stream = None
+        dut._stop_event.clear()
+        dut.reset_run_state()
+
+        logger.dataLogger.warning(f"Monitor started")
+
+        try:
+            try:
+                stream = await asyncio.wait_for(self._open(dut), dut.timeout)
+            except asyncio.TimeoutError:
+                logger.dataLogger.error(f"Connection timed out. No device connected.")
+                dut.set_exit_reason(DUT_EXIT_ERROR)
+                return
+            except (OSError, serial.SerialException) as e:
+                logger.dataLogger.error(f"Serial error occurred: {e}")
+                dut.set_exit_reason(DUT_EXIT_ERROR)
+                return
+            dut.metrics.connections += 1
+
+            deadline = self.loop.time() + dut.timeout
+            while not dut._stop_event.is_set():
+                try:
+                    data = await asyncio.wait_for(
+                        stream.read(), deadline - self.loop.time()
+                    )
+                except asyncio.TimeoutError:
+                    dut.handle_data(None, DUT_QUEUE_EMPTY)
+                    return
+
+                if not data:
+                    logger.consoleLogger.error(f"Connection closed by the device")
+                    dut.set_exit_reason(DUT_EXIT_ERROR)
+                    return
+
+                dut.metrics.bytes_read += len(data)
+                dut.extractor.feed(data)
+                batch = [
+                    dut.build_packet(message) for message in dut.extractor.frames()
+                ]
+                dut.log_discarded()
+                if batch:
+                    if not dut.handle_batch(batch, DUT_QUEUE_NORMAL):
+                        return
+                    deadline = self.loop.time() + dut.timeout
+
+        except Exception:
+            dut.set_exit_reason(DUT_EXIT_ERROR)
+            raise
+        finally:
+            dut._stop_event.set()
+            dut.close_sinks()
+            dut.extractor.clear()
+            if stream:
+                stream.close()
+            dut.report_exit()
+
+    def shutdown(self):
+        """
+        Stop the event loop and wait for its thread to finish.
+        """
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=1)
+        self.sink_executor.shutdown()  # Lets the queued writes and closes finish
@@ -5,3 +5,21 @@ DUT_FRAME_CRC_ERROR = 5
 
 # Configs
 MAX_CONSECUTIVE_CRC_ERRORS = 2
+
+# Serial read defaults, overridable per DUT in dut_config.yaml
+DEFAULT_READ_TIMEOUT = 0.05  # Seconds a read may block waiting for data
+# Bytes a read waits for before returning early, on connections that cannot
+# be polled (e.g. loop://)
+DEFAULT_READ_CHUNK_SIZE = 4096
+MAX_READ_SIZE = 64 * 1024  # Max bytes taken per read from a ready connection
+
+# DUT monitor exit reasons, reported to the Supervisor
+DUT_EXIT_STOPPED = 10  # Stopped on request
+DUT_EXIT_TIMEOUT = 11  # No frame within the DUT timeout
+DUT_EXIT_CRC_LIMIT = 12  # MAX_CONSECUTIVE_CRC_ERRORS reached
+DUT_EXIT_ERROR = 13  # Connection failed or lost
+
+# What a dut_config.yaml change takes to apply to a running DUT
+CONFIG_IN_PLACE = 20  # Applied without interrupting the monitoring
+CONFIG_RECONNECT = 21  # Monitoring restarted, connection reopened
+CONFIG_POWER_CYCLE = 22  # DUT power cycled, then monitoring restarted
@@ -1,9 +1,17 @@
+import os
 import threading
-import select
 import sys
 import json
+import time
+from concurrent.futures import as_completed
 from time import sleep
 from devices.dut import DUT
+from frame.frame_decoder import set_frame_format
+from host.async_engine import AsyncEngine
+from host.supervisor import Supervisor
+from host.log_id import CONFIG_IN_PLACE, CONFIG_POWER_CYCLE
+from radcontrol.utils.config_watcher import ConfigWatcher
+from radcontrol.utils.metrics import MetricsServer, format_metrics
 from radcontrol.utils.logger import Logger
 from radcontrol.power_switch.powerswitch import PowerSwitchController
 from radcontrol.power_switch.error_codes import ErrorCodes
@@ -25,16 +33,33 @@ class Server:
         """
         self.args = args
 
-        self.uart_info = get_dut_info("dut_config.yaml")
+        # Explicit paths, so later reloads do not depend on the working directory
+        self.dut_config = os.path.abspath(
+            getattr(args, "dut_config", "dut_config.yaml")
+        )
+        if getattr(args, "frame_format", None):
+            set_frame_format(args.frame_format)
+        self.uart_info = get_dut_info(self.dut_config)
 
         self.reboot_interval = (
             args.power_cycle_interval
         )  # seconds between powercycle on power controller
 
+        # Without console windows, e.g. on a machine without a desktop
+        self.headless = getattr(args, "headless", False)
+
         self.dut_instances = {}  # Maps DUT names to DUT instances
         self.threads = {}  # Maps DUT names to their threads
+        # Maps DUT names to the power cycle futures of recoveries in flight
+        self.pending_recoveries = {}
+        # DUTs whose power switch outlet changed while being power cycled
+        self.outlet_changes = set()
+        # Maps DUT names to configurations waiting for their monitor to exit
+        self.pending_configs = {}
 
         self.server_logger = Logger(mode="Server", verbose=3)
+        self.supervisor = Supervisor(self)
+        self.pending_prompt = None  # (deadline, callback) for the next input line
 
         self.options = {
             "0": self.print_help,
@@ -51,6 +76,11 @@ class Server:
 
         self.power_controller = PowerSwitchController(args.is_debug_test)
 
+        # "thread": two threads per DUT, "async": every DUT on one event loop
+        self.async_engine = None
+        if getattr(args, "engine", "thread") == "async":
+            self.async_engine = AsyncEngine()
+
         self.start()
 
     def print_arguments(self):
@@ -67,9 +97,16 @@ class Server:
     def create_dut(self):
         """
         Create and initialize DUT instances based on the provided UART information.
+        With parallel_startup, every DUT is power cycled and started concurrently.
         """
+        dut_infos = self.uart_info.get("duts", [])
+        self.supervisor.track_startup([dut_info.get("name") for dut_info in dut_infos])
+        if getattr(self.args, "parallel_startup", False):
+            self.create_dut_parallel(dut_infos)
+            return
+
         try:
-            for dut_info in self.uart_info.get("duts", []):
+            for dut_info in dut_infos:
                 dut_name = dut_info.get("name")
                 if dut_name not in self.dut_instances:
                     self.initialize_and_start_dut(dut_name, dut_info)
@@ -85,15 +122,71 @@ class Server:
                 f"Error creating DUT, connection error: {e}"
             )
 
+    def create_dut_parallel(self, dut_infos):
+        """
+        Queue the power cycles of every DUT at once and start the monitoring of
+        each DUT as soon as its own power cycle completes. The power switch
+        workers run one batch at a time per switch, with every outlet queued for
+        that switch in it.
+        """
+        futures = {}
+        for dut_info in dut_infos:
+            dut_name = dut_info.get("name")
+            if dut_name in self.dut_instances:
+                self.server_logger.consoleLogger.info(
+                    f"DUT already added:\n {json.dumps(dut_info, indent=4)}"
+                )
+                continue
+            try:
+                dut_instance = self.add_dut_instance(dut_name, dut_info)
+            except Exception as e:
+                self.server_logger.consoleLogger.error(
+                    f"Error creating DUT, connection error: {e}"
+                )
+                continue
+            futures[self.power_cycle_dut(dut_instance)] = (dut_name, dut_instance)
+
+        # Started from this thread, the power switch workers only switch outlets
+        for future in as_completed(futures):
+            self.start_dut(*futures[future])
+        self.server_logger.consoleLogger.info(
+            f"Started {len(futures)} DUTs in parallel in "
+            f"{time.monotonic() - self.supervisor.startup_time:.1f}s"
+        )
+
     def start(self):
         """
         Start monitoring DUTs in separate threads and manage their lifecycle.
         """
 
-        open_tmux_window()
-        sleep(1)
-        self.create_dut()
+        if not self.headless:
+            open_tmux_window()
+            sleep(1)
         self.stop_event = threading.Event()
+        self.create_dut()
+
+        # Per-DUT counters for Prometheus, on localhost only
+        self.metrics_server = None
+        metrics_port = getattr(self.args, "metrics_port", 0)
+        if metrics_port:
+            try:
+                self.metrics_server = MetricsServer(
+                    self.collect_metrics, port=metrics_port
+                ).start()
+                self.server_logger.consoleLogger.info(
+                    f"Metrics at http://{self.metrics_server.address}/metrics"
+                )
+            except OSError as e:
+                self.server_logger.consoleLogger.error(
+                    f"Could not serve metrics on port {metrics_port}: {e}"
+                )
+
+        # Apply edits of the DUT configuration while running
+        self.config_watcher = None
+        if getattr(self.args, "watch_config", True):
+            self.config_watcher = ConfigWatcher(
+                [self.dut_config], self.supervisor.post_config_change
+            ).start()
 
         try:
             self.monitor_events()
@@ -102,77 +195,109 @@ class Server:
 
     def power_cycle_dut(self, dut):
         """
-        Power cycle a DUT and wait for the process to complete.
+        Queue a power cycle of a DUT without waiting for it to complete.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the ErrorCodes of the power cycle.
         """
-        shared_data = {"status": None}
-        event = threading.Event()
-        dut.power_controller.queue_power_cycle(
+        dut.metrics.power_cycles += 1
+        future = dut.power_controller.queue_power_cycle(
             dut.power_switch_port,
             dut.power_port_IP,
-            event,
-            shared_data,
             self.reboot_interval,
         )
-        event.wait()
-        # Check the result from the other thread
-        if shared_data["status"] != ErrorCodes.SUCCESS:  # Handle failure
+        future.add_done_callback(
+            lambda future: self.log_power_cycle_result(future, dut)
+        )
+        return future
+
+    def log_power_cycle_result(self, future, dut):
+        status = future.exception() or future.result()
+        if status != ErrorCodes.SUCCESS:  # Handle failure
+            dut.metrics.power_cycle_failures += 1
             self.server_logger.dataLogger.warning(
-                f"Power cycle failed with code: {shared_data['status']}"
+                f"Power cycle of DUT {dut.name} failed with code: {status}"
             )
 
     def start_monitoring_thread(self, dut_name, dut_instance):
         """
         Start a monitoring thread for a DUT and add it to the list of threads.
+        With the async engine, the DUT is followed from the event loop instead.
         """
+        if self.async_engine:
+            self.threads[dut_name] = self.async_engine.start_dut(dut_instance)
+            return
         thread = threading.Thread(target=dut_instance.monitor, daemon=True)
         self.threads[dut_name] = thread
         thread.start()
 
     def monitor_events(self):
         """
-        Monitor the threads and restart them if they are not alive.
+        Handle DUT exits and user input as they arrive, until the server stops.
         """
+        self.write_prompt()
+        self.supervisor.start_input_reader()
+        self.supervisor.run(self.stop_event)
 
-        input_text_string = "Select an option (1-4), or type 0 for help: "
-
-        sys.stdout.write(input_text_string)
+    def write_prompt(self):
+        sys.stdout.write("Select an option (1-4), or type 0 for help: ")
         sys.stdout.flush()
-        while not self.stop_event.is_set():
-
-            # Check for user input
-            if sys.stdin in select.select([sys.stdin], [], [], 0)[0]:
-                user_input = sys.stdin.readline().strip()
-                if user_input in self.options:
-                    self.options[user_input]()  # Execute the corresponding function
-                else:
-                    self.server_logger.consoleLogger.info(
-                        f"Invalid option selected: {user_input}"
-                    )
-                sys.stdout.write(input_text_string)
-                sys.stdout.flush()
 
-            for dut_name, thread in self.threads.items():
-                if not thread.is_alive():
-                    self.restart_dut_monitoring_thread(dut_name)
-            sleep(1)
+    def handle_input(self, user_input):
+        """
+        Execute the menu option typed by the user, or hand the line to the
+        prompt waiting for it.
+        """
+        if self.pending_prompt:
+            deadline, callback = self.pending_prompt
+            self.pending_prompt = None
+            if time.monotonic() <= deadline:
+                callback(user_input)
+                self.write_prompt()
+                return
+            sys.stdout.write("No DUT selected. Exiting.\n")
+
+        if user_input in self.options:
+            self.options[user_input]()  # Execute the corresponding function
+        else:
+            self.server_logger.consoleLogger.info(
+                f"Invalid option selected: {user_input}"
+            )
+        if not self.pending_prompt:
+            self.write_prompt()
 
     def initialize_and_start_dut(self, dut_name, dut_info):
         """
         Create a DUT instance, add it to the server, power it up, start its monitoring thread, and set up monitoring.
         """
+        dut_instance = self.add_dut_instance(dut_name, dut_info)
+
+        # Power cycle the DUT before starting monitoring
+        self.power_cycle_dut(dut_instance).result()
+        self.start_dut(dut_name, dut_instance)
+
+    def add_dut_instance(self, dut_name, dut_info):
+        """
+        Create a DUT instance and add it to the server.
+        """
         self.server_logger.consoleLogger.info(f"Initializing DUT: {dut_name}")
 
         # Create a new DUT instance
         dut_instance = DUT(dut_info, self.power_controller)
+        self.supervisor.attach(dut_instance)
         self.dut_instances[dut_name] = dut_instance
+        return dut_instance
 
-        # Power cycle the DUT before starting monitoring
-        self.power_cycle_dut(dut_instance)
+    def start_dut(self, dut_name, dut_instance):
+        """
+        Start the monitoring of a powered up DUT and its console window.
+        """
         self.start_monitoring_thread(dut_name, dut_instance)
 
         # Set up tmux window for monitoring (if required)
-        log_file_name = "/tmp/logger_" + dut_name
-        add_tmux_window("monitor", dut_name, f"cat {log_file_name}")
+        if not self.headless:
+            log_file_name = "/tmp/logger_" + dut_name
+            add_tmux_window("monitor", dut_name, f"cat {log_file_name}")
 
     def print_help(self):
         help_text = """
@@ -187,8 +312,21 @@ class Server:
 
     def refresh_device_table(self):
         self.server_logger.consoleLogger.info("Refreshing DUTs...")
-        # Load the updated UART info from the configuration file
-        self.uart_info = get_dut_info("dut_config.yaml")
+        # Load the updated UART info from the configuration file, a file saved
+        # halfway or with errors leaves the running DUTs untouched
+        try:
+            uart_info = get_dut_info(self.dut_config)
+            if not all(
+                isinstance(dut_info, dict) and "name" in dut_info
+                for dut_info in uart_info["duts"]
+            ):
+                raise ValueError("every DUT needs at least a name")
+            self.uart_info = uart_info
+        except (Exception, SystemExit) as e:  # load_config exits on invalid YAML
+            self.server_logger.consoleLogger.error(
+                f"Could not load {self.dut_config}, keeping the current DUTs: {e}"
+            )
+            return
 
         # Extract the new set of DUT names from the updated configuration
         new_dut_infos = self.uart_info.get("duts", [])
@@ -226,53 +364,144 @@ class Server:
         for dut_name in self.dut_instances:
             sys.stdout.write(f"->{dut_name}\n")
 
-        sys.stdout.flush()
         sys.stdout.write(f">")
-        # Wait for 5 seconds for user input
-        ready, _, _ = select.select([sys.stdin], [], [], 10)
+        sys.stdout.flush()
+        # The next input line within 10 seconds is the DUT name
+        self.pending_prompt = (time.monotonic() + 10, self.power_cycle_selected)
 
-        if ready:
-            dut_name = sys.stdin.readline().strip()
-            if dut_name in self.dut_instances:
-                self.server_logger.consoleLogger.info(f"Power Cycling {dut_name}")
-                self.restart_dut_monitoring_thread(dut_name)
-            else:
-                sys.stdout.write(f"Invalid DUT selected: {dut_name}")
-                sys.stdout.flush()
+    def power_cycle_selected(self, dut_name):
+        if dut_name in self.dut_instances:
+            self.server_logger.consoleLogger.info(f"Power Cycling {dut_name}")
+            self.restart_dut_monitoring_thread(dut_name)
         else:
-            sys.stdout.write("No DUT selected. Exiting.")
+            sys.stdout.write(f"Invalid DUT selected: {dut_name}\n")
             sys.stdout.flush()
 
     def print_status(self):
         self.server_logger.consoleLogger.info("Active DUTs:")
-        for dut_name in self.dut_instances:
-            self.server_logger.consoleLogger.info(f"DUT Name: {dut_name}")
+        for dut_name, dut_instance in self.dut_instances.items():
+            sink = dut_instance.dut_logger.consoleSink
+            dropped = (
+                f" ({sink.dropped} console lines dropped)"
+                if sink and sink.dropped
+                else ""
+            )
+            recovering = " (recovering)" if dut_name in self.pending_recoveries else ""
+            metrics = dut_instance.metrics
+            self.server_logger.consoleLogger.info(
+                f"DUT Name: {dut_name}{recovering}{dropped}: {metrics.frames} frames, "
+                f"{metrics.crc_errors} CRC errors, {metrics.resync_bytes} bytes resynced, "
+                f"{metrics.timeouts} timeouts"
+            )
+        if self.supervisor.startup_pending:
+            self.server_logger.consoleLogger.info(
+                f"Waiting for the first frame of: {', '.join(sorted(self.supervisor.startup_pending))}"
+            )
+        for dut_name, (count, recover) in self.supervisor.summary().items():
+            self.server_logger.consoleLogger.info(
+                f"DUT {dut_name}: {count} recoveries, mean time to recover {recover:.1f}s"
+            )
+        for switch_ip, stats in self.power_controller.switch_stats().items():
+            self.server_logger.consoleLogger.info(
+                f"Power switch {switch_ip}: {stats['requests']} requests, "
+                f"{stats['errors']} errors, mean latency {stats['mean_latency'] * 1000:.0f} ms"
+                + (", circuit open" if stats["circuit_open"] else "")
+            )
+
+    def collect_metrics(self):
+        """
+        Build the metrics page of every DUT, called by the metrics endpoint.
+        """
+        now = time.monotonic()
+        samples = {}
+        for dut_name, dut_instance in list(self.dut_instances.items()):
+            values = dut_instance.metrics.sample(now)
+            if not self.async_engine:
+                # The async engine hands frames over without a queue
+                values["queue_depth"] = dut_instance.output_queue.qsize()
+            values["last_frame_age_seconds"] = (
+                now - dut_instance.last_frame_time
+                if dut_instance.last_frame_time is not None
+                else float("nan")
+            )
+            thread = self.threads.get(dut_name)
+            values["up"] = int(thread is not None and thread.is_alive())
+            samples[dut_name] = values
+        return format_metrics(samples)
 
     def restart_dut_monitoring_thread(self, dut_name):
         """
-        Restart a monitoring thread for a DUT that is not alive.
+        Restart a monitoring thread for a DUT that is not alive. The DUT is
+        power cycled in the background and its monitoring restarts once the
+        power cycle completes, so many DUTs can recover at once.
         """
+        if dut_name in self.pending_recoveries:
+            return
         dut_instance = self.dut_instances[dut_name]
         self.server_logger.consoleLogger.warning(
             f"Thread for DUT {dut_name} is not alive. Restarting..."
         )
-        self.power_cycle_dut(dut_instance)
-        new_thread = threading.Thread(target=dut_instance.monitor, daemon=True)
-        dut_instance._stop_event = threading.Event()
-        self.threads[dut_name] = new_thread
-        new_thread.start()
+        self.queue_recovery(dut_name, dut_instance)
+
+    def queue_recovery(self, dut_name, dut_instance):
+        """
+        Power cycle a DUT in the background. The power switch worker only posts
+        the completion to the supervisor, the main loop then resumes the DUT
+        (see finish_power_cycle).
+        """
+        future = self.power_cycle_dut(dut_instance)
+        self.pending_recoveries[dut_name] = future
+        future.add_done_callback(
+            lambda future: self.supervisor.post_power_cycled(dut_instance, future)
+        )
+
+    def finish_power_cycle(self, dut_name, dut_instance, future):
+        """
+        Start the monitoring of a DUT once its power cycle completed, unless the
+        server stopped or the DUT was removed meanwhile. Called from the main
+        loop.
+        """
+        if self.pending_recoveries.get(dut_name) is future:
+            del self.pending_recoveries[dut_name]
+        if (
+            self.stop_event.is_set()
+            or self.dut_instances.get(dut_name) is not dut_instance
+        ):
+            return
+        if dut_name in self.outlet_changes:
+            # The cycle switched the previous outlet, cycle the new one too
+            self.outlet_changes.discard(dut_name)
+            self.queue_recovery(dut_name, dut_instance)
+            return
+
+        thread = self.threads.get(dut_name)
+        if thread is not None:
+            if thread.is_alive():
+                return  # Power cycled from the menu while monitored
+            dut_instance._stop_event = threading.Event()
+            self.start_monitoring_thread(dut_name, dut_instance)
+        else:
+            self.start_dut(dut_name, dut_instance)  # First start, with its window
 
     def stop(self):
         """
         Signal the main loop to stop, shut down the power controller, and clean up threads.
         """
         self.stop_event.set()
+        if getattr(self, "config_watcher", None):
+            self.config_watcher.stop()
+        if getattr(self, "metrics_server", None):
+            self.metrics_server.stop()
+            self.metrics_server = None
         self.power_controller.shutdown()
 
         # Stop and clean up all DUTs
         for dut_name in list(self.dut_instances.keys()):
             self.remove_dut(dut_name)
 
+        if self.async_engine:
+            self.async_engine.shutdown()
+
         exit()
 
     def remove_dut(self, dut_name):
@@ -284,30 +513,84 @@ class Server:
         # Stop the DUT's monitoring thread
         dut_instance = self.dut_instances[dut_name]
         dut_instance.stop()  # Ensure the DUT's monitor method can exit
-        thread = self.threads[dut_name]
-        if thread.is_alive():
+        thread = self.threads.get(dut_name)
+        if thread and thread.is_alive():
             thread.join(timeout=1)  # Wait for the thread to finish
 
         # Remove DUT from dictionaries
         del self.dut_instances[dut_name]
-        del self.threads[dut_name]
+        self.threads.pop(dut_name, None)
+        self.outlet_changes.discard(dut_name)
+        self.pending_configs.pop(dut_name, None)
 
-        remove_tmux_window("monitor", dut_name)
+        if not self.headless:
+            remove_tmux_window("monitor", dut_name)
 
     def add_new_dut(self, dut_name, dut_info):
         """
-        Add and initialize a new DUT to the server.
+        Add and initialize a new DUT to the server. The DUT is powered up in
+        the background and monitored once the power cycle completes.
         """
         self.server_logger.consoleLogger.info(f"Adding new DUT: {dut_name}")
-        self.initialize_and_start_dut(dut_name, dut_info)
+        dut_instance = self.add_dut_instance(dut_name, dut_info)
+        self.queue_recovery(dut_name, dut_instance)
 
     def update_existing_dut(self, dut_name, new_dut_info):
         """
-        Update the configuration of an existing DUT if necessary.
+        Apply a changed configuration to an existing DUT, interrupting it no
+        more than needed: fields like the timeout are applied in place, a
+        changed connection restarts the monitoring and a changed power switch
+        outlet power cycles the DUT.
         """
+        if dut_name in self.pending_configs:
+            # The monitor is stopping, the latest configuration wins
+            self.pending_configs[dut_name] = new_dut_info
+            return
         dut_instance = self.dut_instances[dut_name]
-        if dut_instance.config != new_dut_info:
-            self.server_logger.consoleLogger.info(
-                f"Updating configuration for DUT: {dut_name}"
-            )
+        action, changed = dut_instance.config_action(new_dut_info)
+        if not changed:
+            return
+        self.server_logger.consoleLogger.info(
+            f"Updating configuration for DUT {dut_name}: {', '.join(sorted(changed))}"
+        )
+        if action == CONFIG_IN_PLACE:
+            dut_instance.apply_config(new_dut_info)
+            return
+
+        # Also while power cycled from the menu, the monitor keeps running then
+        thread = self.threads.get(dut_name)
+        if thread and thread.is_alive():
+            dut_instance.stop()
+            thread.join(timeout=1)
+            if thread.is_alive():
+                # Applied when the monitor reports its exit to the supervisor
+                self.pending_configs[dut_name] = new_dut_info
+                return
+        self.reconfigure_stopped_dut(dut_name, new_dut_info, action)
+
+    def apply_pending_config(self, dut_name):
+        """
+        Apply the configuration deferred by update_existing_dut, once the
+        monitor of the DUT exited.
+        """
+        new_dut_info = self.pending_configs.pop(dut_name)
+        action, _ = self.dut_instances[dut_name].config_action(new_dut_info)
+        self.reconfigure_stopped_dut(dut_name, new_dut_info, action)
+
+    def reconfigure_stopped_dut(self, dut_name, new_dut_info, action):
+        """
+        Apply a configuration to a DUT whose monitor exited and start it again,
+        after a power cycle if its outlet changed.
+        """
+        dut_instance = self.dut_instances[dut_name]
+        dut_instance.apply_config(new_dut_info)
+        if dut_name in self.pending_recoveries:
+            # The recovery in flight starts the monitoring with the new values,
+            # after one more power cycle if the outlet changed
+            if action == CONFIG_POWER_CYCLE:
+                self.outlet_changes.add(dut_name)
+        elif action == CONFIG_POWER_CYCLE:
             self.restart_dut_monitoring_thread(dut_name)
+        else:
+            dut_instance._stop_event = threading.Event()
+            self.start_monitoring_thread(dut_name, dut_instance)
@@ -0,0 +1,233 @@
+import queue
+import sys
+import threading
+import time
+from collections import namedtuple
+from host.log_id import (
+    DUT_EXIT_STOPPED,
+    DUT_EXIT_TIMEOUT,
+    DUT_EXIT_CRC_LIMIT,
+    DUT_EXIT_ERROR,
+)
+
+EXIT_REASONS = {
+    DUT_EXIT_STOPPED: "stopped",
+    DUT_EXIT_TIMEOUT: "timeout",
+    DUT_EXIT_CRC_LIMIT: "CRC limit",
+    DUT_EXIT_ERROR: "connection error",
+}
+
+# kind is "exit", "ready", "input", "config" or "power_cycled"; timestamp is
+# time.monotonic()
+SupervisorEvent = namedtuple(
+    "SupervisorEvent", ["kind", "dut_name", "dut", "value", "timestamp"]
+)
+
+# Durations in seconds: last frame to exit report (detect), exit report to
+# restart request (react) and exit report to first valid frame (recover)
+Incident = namedtuple(
+    "Incident", ["dut_name", "reason", "detect", "react", "recover", "timestamp"]
+)
+
+
+class Supervisor:
+    """
+    Event-driven supervision of the DUT monitors.
+
+    DUTs report the end of their monitoring run, with an exit reason, and their
+    first valid frame through ``notify``. Console input, read by a thread,
+    changes of the DUT configuration file and completed power cycles feed the
+    same queue. The server main loop blocks on that queue, so a dead DUT is
+    restarted as soon as it reports, without polling.
+
+    Every restart is tracked as an incident, recording the time to detect the
+    failure, to react to it and to recover (first valid frame after restart).
+    A slow sweep over the threads remains as a safety net.
+
+    Args:
+        server (Server): The server whose DUTs are supervised.
+        sweep_interval (float): Seconds between safety sweeps over the threads.
+    """
+
+    def __init__(self, server, sweep_interval=5.0):
+        self.server = server
+        self.sweep_interval = sweep_interval
+        self.events = queue.Queue()
+        self.incidents = []  # Completed incidents, oldest first
+        self._open_incidents = {}  # Maps DUT names to [reason, exit time, ...]
+        self.input_thread = None
+
+        # Bring-up: seconds from server start to the first valid frame per DUT
+        self.startup_time = None
+        self.startup_pending = set()
+        self.ready_times = {}
+
+    def attach(self, dut):
+        """
+        Route the notifications of a DUT to this supervisor.
+        """
+        dut.notify = lambda kind, value: self.events.put(
+            SupervisorEvent(kind, dut.name, dut, value, time.monotonic())
+        )
+
+    def track_startup(self, dut_names):
+        """
+        Start measuring the bring-up of the given DUTs, each is ready on its
+        first valid frame.
+        """
+        self.startup_time = time.monotonic()
+        self.startup_pending = set(dut_names)
+        self.ready_times = {}
+
+    def post_config_change(self, path):
+        """
+        Queue a "config" event for a changed configuration file, it is then
+        applied from the main loop like any other event.
+        """
+        self.events.put(SupervisorEvent("config", None, None, path, time.monotonic()))
+
+    def post_power_cycled(self, dut, future):
+        """
+        Queue a "power_cycled" event for a completed power cycle future. Called
+        from the power switch worker, the DUT is resumed from the main loop.
+        """
+        self.events.put(
+            SupervisorEvent("power_cycled", dut.name, dut, future, time.monotonic())
+        )
+
+    def start_input_reader(self, stream=sys.stdin):
+        """
+        Read console input on a thread and queue it as "input" events.
+        """
+
+        def read_input():
+            for line in stream:
+                self.events.put(
+                    SupervisorEvent("input", None, None, line.strip(), time.monotonic())
+                )
+
+        self.input_thread = threading.Thread(target=read_input, daemon=True)
+        self.input_thread.start()
+
+    def run(self, stop_event):
+        """
+        Handle events until stop_event is set.
+        """
+        next_sweep = time.monotonic() + self.sweep_interval
+        while not stop_event.is_set():
+            try:
+                event = self.events.get(timeout=max(0, next_sweep - time.monotonic()))
+            except queue.Empty:
+                event = None
+
+            if event is not None:
+                self.handle(event)
+            if time.monotonic() >= next_sweep:
+                self.sweep()
+                next_sweep = time.monotonic() + self.sweep_interval
+
+    def handle(self, event):
+        if event.kind == "input":
+            self.server.handle_input(event.value)
+        elif event.kind == "exit":
+            self.handle_exit(event)
+        elif event.kind == "ready":
+            self.handle_ready(event)
+        elif event.kind == "config":
+            self.server.server_logger.consoleLogger.info(f"{event.value} changed")
+            self.server.refresh_device_table()
+        elif event.kind == "power_cycled":
+            self.server.finish_power_cycle(event.dut_name, event.dut, event.value)
+
+    def handle_exit(self, event):
+        server = self.server
+        if server.stop_event.is_set():
+            return
+        if server.dut_instances.get(event.dut_name) is not event.dut:
+            return  # Removed or replaced meanwhile
+        if event.dut_name in server.pending_configs:
+            server.apply_pending_config(event.dut_name)
+            return
+        if event.value == DUT_EXIT_STOPPED:
+            return
+
+        dut = event.dut
+        detect = (
+            event.timestamp - dut.last_frame_time
+            if dut.last_frame_time is not None
+            else None
+        )
+        server.server_logger.consoleLogger.warning(
+            f"DUT {event.dut_name} stopped: {EXIT_REASONS.get(event.value, event.value)}"
+        )
+        server.restart_dut_monitoring_thread(event.dut_name)
+        self._open_incidents[event.dut_name] = [
+            event.value,
+            event.timestamp,
+            detect,
+            time.monotonic() - event.timestamp,
+        ]
+
+    def handle_ready(self, event):
+        if event.dut_name in self.startup_pending:
+            self.handle_startup_ready(event)
+            return
+
+        incident = self._open_incidents.pop(event.dut_name, None)
+        if incident is None:
+            return
+        reason, exit_time, detect, react = incident
+        incident = Incident(
+            event.dut_name,
+            reason,
+            detect,
+            react,
+            event.timestamp - exit_time,
+            time.time(),
+        )
+        self.incidents.append(incident)
+        self.server.server_logger.dataLogger.info(
+            f"DUT {event.dut_name} recovered from {EXIT_REASONS.get(reason, reason)}: "
+            f"detect {_format_duration(incident.detect)}, "
+            f"react {_format_duration(incident.react)}, "
+            f"recover {_format_duration(incident.recover)}"
+        )
+
+    def handle_startup_ready(self, event):
+        logger = self.server.server_logger
+        self.startup_pending.discard(event.dut_name)
+        ready_time = event.timestamp - self.startup_time
+        self.ready_times[event.dut_name] = ready_time
+        logger.consoleLogger.info(f"DUT {event.dut_name} ready after {ready_time:.1f}s")
+        if not self.startup_pending:
+            logger.consoleLogger.info(
+                f"All {len(self.ready_times)} DUTs ready, bring-up took "
+                f"{max(self.ready_times.values()):.1f}s"
+            )
+
+    def sweep(self):
+        # Safety net for a monitor that ended without reporting
+        server = self.server
+        for dut_name, thread in list(server.threads.items()):
+            if thread.is_alive():
+                continue
+            if dut_name in server.pending_configs:
+                server.apply_pending_config(dut_name)
+            elif dut_name not in server.pending_recoveries:
+                server.restart_dut_monitoring_thread(dut_name)
+
+    def summary(self):
+        """
+        Return the number of incidents and mean time to recover per DUT.
+        """
+        per_dut = {}
+        for incident in self.incidents:
+            per_dut.setdefault(incident.dut_name, []).append(incident.recover)
+        return {
+            dut_name: (len(recoveries), sum(recoveries) / len(recoveries))
+            for dut_name, recoveries in per_dut.items()
+        }
+
+
+def _format_duration(seconds):
+    return "n/a" if seconds is None else f"{seconds:.3f}s"
@@ -16,6 +16,8 @@ class ErrorCodes(Enum):
     MAXIMUM_OS_REBOOT_REACHED = auto()
     DISABLED_SOFT_OS_REBOOT = auto()
     HOST_UNREACHABLE = auto()
+    # Power switch failed repeatedly, requests fail fast until it cools down
+    CIRCUIT_OPEN = auto()
 
     def __str__(self) -> str:
         """Override the str method
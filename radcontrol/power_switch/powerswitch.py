@@ -1,40 +1,196 @@
 import base64
 import json
-import subprocess
 import time
 import threading
 import queue
+from concurrent.futures import Future
 import requests
 from requests.auth import HTTPBasicAuth
 from radcontrol.power_switch.error_codes import ErrorCodes
 from radcontrol.utils.logger import Logger
 
 
+class SwitchConnection:
+    """
+    Pooled HTTP connection to one power switch, with timeouts, retries and a
+    circuit breaker.
+
+    Requests go through a keep-alive session. Connection errors, timeouts and
+    5xx answers are retried with exponential backoff. After breaker_threshold
+    failed requests in a row the breaker opens: requests fail at once with
+    ErrorCodes.CIRCUIT_OPEN for breaker_cooldown seconds, then one request is let
+    through to probe the switch.
+
+    Args:
+        switch_ip (str): The IP address of the switch, optionally with a port.
+        connect_timeout (float): Seconds to wait for the TCP connection.
+        read_timeout (float): Seconds to wait for the answer.
+        retries (int): Retries of a failed request.
+        backoff (float): Seconds before the first retry, doubled for each next.
+        breaker_threshold (int): Failed requests in a row opening the breaker.
+        breaker_cooldown (float): Seconds the breaker stays open.
+    """
+
+    def __init__(
+        self,
+        switch_ip,
+        connect_timeout=3,
+        read_timeout=5,
+        retries=2,
+        backoff=0.5,
+        breaker_threshold=3,
+        breaker_cooldown=60,
+    ):
+        self.switch_ip = switch_ip
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        self.session.mount("http://", adapter)
+
+        self.failures = 0  # Failed requests in a row
+        self.open_until = 0
+        # Latency counters of the requests that got an answer
+        self.requests = 0
+        self.errors = 0
+        self.answered = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = 0.0
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request to the switch.
+
+        Args:
+            method (str): HTTP method.
+            url (str): The full URL.
+            **kwargs: Passed to requests.Session.request.
+
+        Returns:
+            ErrorCodes: The status code indicating the result of the request.
+        """
+        if time.monotonic() < self.open_until:
+            return ErrorCodes.CIRCUIT_OPEN
+
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            return_code, retry = self._send(method, url, **kwargs)
+            if not retry:
+                break
+
+        if return_code == ErrorCodes.SUCCESS:
+            self.failures = 0
+            self.open_until = 0
+        else:
+            self.failures += 1
+            if self.failures >= self.breaker_threshold:
+                self.open_until = time.monotonic() + self.breaker_cooldown
+        return return_code
+
+    def _send(self, method, url, **kwargs):
+        # Returns the status code and whether the request is worth retrying
+        self.requests += 1
+        start = time.monotonic()
+        try:
+            requests_status = self.session.request(
+                method, url, timeout=self.timeout, **kwargs
+            )
+        except requests.exceptions.Timeout as timeout_error:
+            self.errors += 1
+            return ErrorCodes.TIMEOUT_ERROR, True
+        except requests.exceptions.ConnectionError as connection_error:
+            self.errors += 1
+            return ErrorCodes.CONNECTION_ERROR, True
+        except requests.exceptions.RequestException as general_error:
+            self.errors += 1
+            return ErrorCodes.GENERAL_ERROR, False
+
+        latency = time.monotonic() - start
+        self.answered += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.last_latency = latency
+
+        try:
+            requests_status.raise_for_status()
+        except requests.exceptions.HTTPError as http_error:
+            self.errors += 1
+            # A busy or rebooting switch answers 5xx, worth another try
+            return ErrorCodes.HTTP_ERROR, requests_status.status_code >= 500
+        return ErrorCodes.SUCCESS, False
+
+    def stats(self):
+        """
+        Return the request and latency counters of this switch.
+        """
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "mean_latency": (
+                self.total_latency / self.answered if self.answered else 0.0
+            ),
+            "max_latency": self.max_latency,
+            "last_latency": self.last_latency,
+            "circuit_open": time.monotonic() < self.open_until,
+        }
+
+    def close(self):
+        self.session.close()
+
+
 class PowerSwitchController:
     on_state = 0
     off_state = 1
 
-    def __init__(self, is_debug_test):
+    def __init__(self, is_debug_test, coalesce_window=0.5, connection_options=None):
         """
         Initialize the PowerSwitchController instance.
 
-        Raises:
-            OSError: If CURL is not available.
+        Args:
+            is_debug_test (bool): Drive UT lab switches instead of Lindy switches.
+            coalesce_window (float): Seconds a switch worker waits for more power
+                cycles on the same switch before handling a batch.
+            connection_options (dict): Timeouts, retries and breaker settings
+                passed to every SwitchConnection.
         """
-        # Check if curl is available
-        try:
-            subprocess.call(["curl", "--help"], stdout=subprocess.PIPE)
-        except OSError:
-            raise OSError(
-                "CURL is not available, please install curl before using this module"
-            )
-
         self.is_debug_test = is_debug_test
+        self.coalesce_window = coalesce_window
 
         self.power_switch_logger = Logger(mode="PowerS", verbose=3)
-        self.command_queue = queue.Queue()
-        self.switch_thread = threading.Thread(target=self._process_commands)
-        self.switch_thread.start()
+        # One command queue and worker thread per switch IP, so switches power
+        # cycle in parallel and outlets of the same switch can be batched
+        self.command_queues = {}
+        self.switch_threads = {}
+        self._workers_lock = threading.Lock()
+        # Pooled HTTP connection per switch IP
+        self.connection_options = connection_options or {}
+        self.connections = {}
+
+    def connection(self, switch_ip):
+        """
+        Return the pooled connection to a switch, created on first use.
+        """
+        with self._workers_lock:
+            connection = self.connections.get(switch_ip)
+            if connection is None:
+                connection = self.connections[switch_ip] = SwitchConnection(
+                    switch_ip, **self.connection_options
+                )
+            return connection
+
+    def switch_stats(self):
+        """
+        Return the request and latency counters of every switch used so far.
+        """
+        with self._workers_lock:
+            connections = dict(self.connections)
+        return {ip: connection.stats() for ip, connection in connections.items()}
 
     def _switch_UT_lab(self, switch_ip, port, operation):
         """
@@ -46,34 +202,22 @@ class PowerSwitchController:
             operation (int): Operation type: 0 - On, 1 - Off, 2 - On/Off
 
         Returns:
-            Response: The response object from the HTTP request.
+            ErrorCodes: The status code indicating the result of the operation.
         """
         BASE_URL = "http://{}/control_outlet.htm?outlet{}=1&op={}&submit=Apply"
         USER = "snmp"
         PASS = "1234"
 
-        try:
-            requests_status = requests.get(
-                BASE_URL.format(switch_ip, port - 1, operation),
-                auth=HTTPBasicAuth(USER, PASS),
-            )
-            requests_status.raise_for_status()
-            reboot_status = ErrorCodes.SUCCESS
-        except requests.exceptions.HTTPError as http_error:
-            reboot_status = ErrorCodes.HTTP_ERROR
-        except requests.exceptions.ConnectionError as connection_error:
-            reboot_status = ErrorCodes.CONNECTION_ERROR
-        except requests.exceptions.Timeout as timeout_error:
-            reboot_status = ErrorCodes.TIMEOUT_ERROR
-        except requests.exceptions.RequestException as general_error:
-            reboot_status = ErrorCodes.GENERAL_ERROR
-
-        return reboot_status
+        return self.connection(switch_ip).request(
+            "GET",
+            BASE_URL.format(switch_ip, port - 1, operation),
+            auth=HTTPBasicAuth(USER, PASS),
+        )
 
     def _lindy_switch(
         self,
         status: str,
-        switch_port: int,
+        switch_port,
         switch_ip: str,
         username="snmp",
         password="1234",
@@ -83,7 +227,8 @@ class PowerSwitchController:
 
         Args:
             status (str): The desired switch status ("ON" or "OFF").
-            switch_port (int): The port number of the switch to change.
+            switch_port (int or list): The port number(s) of the switch to change,
+                all set with one request.
             switch_ip (str): The IP address of the switch.
             username (str): The username for switch authentication.
             password (str): The password for switch authentication.
@@ -92,8 +237,12 @@ class PowerSwitchController:
             ErrorCodes: The status code indicating the result of the operation.
         """
 
+        switch_ports = (
+            switch_port if isinstance(switch_port, (list, tuple)) else [switch_port]
+        )
         switch_status_list = list("000000000000000000000000")
-        switch_status_list[int(switch_port) - 1] = "1"
+        for port in switch_ports:
+            switch_status_list[int(port) - 1] = "1"
         led = "".join(switch_status_list)
         if status == self.on_state:
             url = f"http://{switch_ip}/ons.cgi?led={led}"
@@ -117,103 +266,177 @@ class PowerSwitchController:
         }
 
         default_string = "Could not change Lindy IP switch status, portNumber:"
-        try:
-            requests_status = requests.post(
-                url, data=json.dumps(payload), headers=headers
-            )
-            requests_status.raise_for_status()
-            reboot_status = ErrorCodes.SUCCESS
-        except requests.exceptions.HTTPError as http_error:
-            reboot_status = ErrorCodes.HTTP_ERROR
-        except requests.exceptions.ConnectionError as connection_error:
-            reboot_status = ErrorCodes.CONNECTION_ERROR
-        except requests.exceptions.Timeout as timeout_error:
-            reboot_status = ErrorCodes.TIMEOUT_ERROR
-        except requests.exceptions.RequestException as general_error:
-            reboot_status = ErrorCodes.GENERAL_ERROR
-
-        return reboot_status
+        return self.connection(switch_ip).request(
+            "POST", url, data=json.dumps(payload), headers=headers
+        )
 
-    def power_cycle(
-        self, select_power_switch, power_IP, event, shared_data, interval=10
-    ):
+    def power_cycle(self, select_power_switch, power_IP, interval=10):
         """
-        Perform a power cycle on the specified power switch.
+        Perform a power cycle on the specified power switch, in the calling thread.
 
         Args:
             select_power_switch (int): The port number of the switch to power cycle.
             power_IP (str): The IP address of the power switch.
-            event (threading.Event): Event to signal completion.
-            shared_data (dict): Dictionary to share more information between threads.
             interval (int): Time to wait between power off and power on.
 
         Returns:
             ErrorCodes: The status code indicating the result of the operation.
         """
+        future = Future()
+        self.power_cycle_batch(
+            power_IP, [(select_power_switch, power_IP, future, interval)]
+        )
+        return future.result()
+
+    def power_cycle_batch(self, power_IP, commands):
+        """
+        Power cycle several outlets of the same power switch at once.
+
+        Lindy switches take every outlet of the batch in a single off and a
+        single on request. UT lab switches get all off requests, one wait and
+        then all on requests. Either way the batch takes about one cycle.
 
-        if select_power_switch > 8:
-            self.power_switch_logger.consoleLogger.error(f"No power control!!")
-            shared_data["status"] = ErrorCodes.SUCCESS
-            event.set()
+        Args:
+            power_IP (str): The IP address of the power switch.
+            commands (list): (select_power_switch, power_IP, future, interval)
+                tuples as queued by queue_power_cycle. Each future gets the
+                ErrorCodes of its outlet.
+        """
+        batch = []
+        for command in commands:
+            select_power_switch, _, future, _ = command
+            if not future.set_running_or_notify_cancel():
+                continue  # Cancelled while queued
+            if select_power_switch > 8:
+                self.power_switch_logger.consoleLogger.error(f"No power control!!")
+                future.set_result(ErrorCodes.SUCCESS)
+            else:
+                batch.append(command)
+        if not batch:
             return
 
-        self.power_switch_logger.consoleLogger.warning(
-            f"Powering down {select_power_switch}"
-        )
+        try:
+            status = self._cycle_outlets(
+                power_IP,
+                sorted({command[0] for command in batch}),
+                max(command[3] for command in batch),
+            )
+        except Exception as e:
+            for command in batch:
+                command[2].set_exception(e)
+            return
+
+        for select_power_switch, _, future, _ in batch:
+            future.set_result(status[select_power_switch])
+
+    def _cycle_outlets(self, power_IP, ports, interval):
+        # Returns the ErrorCodes of every outlet
+        self.power_switch_logger.consoleLogger.warning(f"Powering down {ports}")
 
         # Choose the appropriate function based on the context
-        switch_func = self._switch_UT_lab if self.is_debug_test else self._lindy_switch
+        if self.is_debug_test:
+            off_codes = {
+                port: self._switch_UT_lab(power_IP, port, self.off_state)
+                for port in ports
+            }
+        else:
+            return_code = self._lindy_switch(self.off_state, ports, power_IP)
+            off_codes = dict.fromkeys(ports, return_code)
 
-        # Perform power cycle
-        return_code = switch_func(self.off_state, select_power_switch, power_IP)
-        if return_code != ErrorCodes.SUCCESS:
-            shared_data["status"] = return_code
-            event.set()
-            return
+        if ErrorCodes.CIRCUIT_OPEN in off_codes.values():
+            self.power_switch_logger.consoleLogger.error(
+                f"Power switch {power_IP} keeps failing, not trying it for now"
+            )
+
+        # Outlets that failed to power down are not powered up again
+        status = {
+            port: code for port, code in off_codes.items() if code != ErrorCodes.SUCCESS
+        }
+        ports = [port for port in ports if port not in status]
+        if not ports:
+            return status
 
         time.sleep(interval)
 
-        return_code = switch_func(self.on_state, select_power_switch, power_IP)
-        self.power_switch_logger.consoleLogger.warning(
-            f"Powering up {select_power_switch}"
-        )
+        if self.is_debug_test:
+            for port in ports:
+                status[port] = self._switch_UT_lab(power_IP, port, self.on_state)
+        else:
+            return_code = self._lindy_switch(self.on_state, ports, power_IP)
+            status.update(dict.fromkeys(ports, return_code))
+        self.power_switch_logger.consoleLogger.warning(f"Powering up {ports}")
 
-        shared_data["status"] = return_code
         time.sleep(interval + 1)
-        event.set()
-        return
+        return status
 
-    def _process_commands(self):
+    def _process_commands(self, power_IP, command_queue):
         """
-        Process commands from the command queue to power cycle devices.
+        Process the power cycle commands of one power switch, batching those
+        queued within the coalesce window.
         """
         while True:
-            command = self.command_queue.get()
+            command = command_queue.get()
             if command is None:  # Exit signal
                 break
-            self.power_cycle(*command)
-            self.command_queue.task_done()
 
-    def queue_power_cycle(
-        self, select_power_switch, power_IP, event, shared_data, interval
-    ):
+            commands = [command]
+            deadline = time.monotonic() + self.coalesce_window
+            stop = False
+            while True:
+                try:
+                    command = command_queue.get(
+                        timeout=max(0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    break
+                if command is None:
+                    stop = True
+                    break
+                commands.append(command)
+
+            self.power_cycle_batch(power_IP, commands)
+            if stop:
+                break
+
+    def queue_power_cycle(self, select_power_switch, power_IP, interval):
         """
         Queue a power cycle command for a specified power switch.
 
         Args:
             select_power_switch (int): The port number of the switch to power cycle.
             power_IP (str): The IP address of the power switch.
-            event (threading.Event): Event to signal completion.
-            shared_data (dict): Dictionary to share more information between threads.
             interval (int): Time to wait between power off and power on.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the ErrorCodes of the power
+            cycle once the DUT is powered up again. Callbacks added to it run on
+            the switch worker thread.
         """
-        self.command_queue.put(
-            (select_power_switch, power_IP, event, shared_data, interval)
-        )
+        future = Future()
+        with self._workers_lock:
+            command_queue = self.command_queues.get(power_IP)
+            if command_queue is None:
+                command_queue = self.command_queues[power_IP] = queue.Queue()
+                thread = threading.Thread(
+                    target=self._process_commands,
+                    args=(power_IP, command_queue),
+                    name=f"PowerSwitch-{power_IP}",
+                )
+                self.switch_threads[power_IP] = thread
+                thread.start()
+        command_queue.put((select_power_switch, power_IP, future, interval))
+        return future
 
     def shutdown(self):
         """
-        Shut down the power switch controller, stopping the command processing thread.
+        Shut down the power switch controller, stopping the switch worker threads
+        once their queued commands are done.
         """
-        self.command_queue.put(None)
-        self.switch_thread.join()
+        with self._workers_lock:
+            for command_queue in self.command_queues.values():
+                command_queue.put(None)
+            threads = list(self.switch_threads.values())
+        for thread in threads:
+            thread.join()
+        for connection in self.connections.values():
+            connection.close()
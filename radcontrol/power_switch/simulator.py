@@ -0,0 +1,253 @@
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class _SwitchHandler(BaseHTTPRequestHandler):
+    # Keep-alive, like the real switches
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        simulator = self.server.simulator
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        simulator.record(self.command, self.path)
+
+        fault = simulator.next_fault()
+        if fault == "hang":
+            # Accept the request and never answer it, like a stuck switch
+            simulator.wait(simulator.hang_time)
+            self.close_connection = True
+            return
+        simulator.wait(simulator.response_latency())
+        if fault == "error":
+            self._reply(503, b"Busy")
+            return
+
+        if url.path in ("/ons.cgi", "/offs.cgi"):
+            led = query.get("led", [""])[0]
+            outlets = [index for index, bit in enumerate(led) if bit == "1"]
+            simulator.set_outlets(outlets, url.path == "/ons.cgi")
+        elif url.path == "/control_outlet.htm":
+            outlets = [
+                int(key[len("outlet") :])
+                for key, value in query.items()
+                if key.startswith("outlet") and value == ["1"]
+            ]
+            operation = query.get("op", ["0"])[0]
+            # 0 - On, 1 - Off, 2 - On/Off
+            if operation in ("1", "2"):
+                simulator.set_outlets(outlets, False)
+            if operation in ("0", "2"):
+                simulator.set_outlets(outlets, True)
+        else:
+            self._reply(404, b"Not found")
+            return
+        self._reply(200, b"OK")
+
+    def _reply(self, code, body):
+        self.send_response(code)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PowerSwitchSimulator:
+    """
+    Local HTTP stand-in for a Lindy or UT lab power switch.
+
+    Serves the ``ons.cgi``/``offs.cgi`` (Lindy) and ``control_outlet.htm`` (UT
+    lab) endpoints used by PowerSwitchController, keeps the outlet states and
+    records every request. Use its address as power_port_IP to exercise power
+    cycling without hardware.
+
+    Faults can be injected to test the failure handling: every request is
+    answered after latency (plus up to jitter) seconds, fails with a 503 with
+    probability error_rate, or hangs without an answer for hang_time seconds
+    with probability hang_rate. The settings are attributes and can be changed
+    while running. Outlet state changes are kept in history.
+
+    Args:
+        host (str): Address to listen on.
+        port (int): Port to listen on, 0 picks a free one.
+        outlets (int): Number of outlets.
+        latency (float): Seconds before answering a request.
+        jitter (float): Random extra latency, up to this many seconds.
+        error_rate (float): Fraction of requests answered with an error.
+        hang_rate (float): Fraction of requests never answered.
+        hang_time (float): Seconds a hanging request holds the connection.
+        seed (int, optional): Seed of the fault injection.
+
+    Example:
+        simulator = PowerSwitchSimulator().start()
+        future = controller.queue_power_cycle(3, simulator.address, 1)
+        future.result()
+        simulator.stop()
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        outlets=24,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        hang_rate=0.0,
+        hang_time=30.0,
+        seed=None,
+    ):
+        self.server = ThreadingHTTPServer((host, port), _SwitchHandler)
+        self.server.daemon_threads = True
+        self.server.simulator = self
+        self.outlets = [True] * outlets  # On at start
+        self.requests = []  # (method, path) of every request
+        # (time.monotonic(), outlet, on) of every outlet state change
+        self.history = []
+        self.thread = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang_time = hang_time
+        self.rng = random.Random(seed)
+        self.errors = 0  # Requests answered with an injected error
+        self.hangs = 0  # Requests left without an answer
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"{host}:{port}"
+
+    def record(self, method, path):
+        with self._lock:
+            self.requests.append((method, path))
+
+    def next_fault(self):
+        """
+        Draw the injected fault of a request: "hang", "error" or None.
+        """
+        with self._lock:
+            draw = self.rng.random()
+            if draw < self.hang_rate:
+                self.hangs += 1
+                return "hang"
+            if draw < self.hang_rate + self.error_rate:
+                self.errors += 1
+                return "error"
+        return None
+
+    def response_latency(self):
+        with self._lock:
+            return self.latency + self.rng.random() * self.jitter
+
+    def wait(self, seconds):
+        # Cut short when the simulator stops
+        if seconds > 0:
+            self._stopped.wait(seconds)
+
+    def set_outlets(self, outlets, on):
+        """
+        Switch outlets on or off, outlet numbers starting at 0.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for outlet in outlets:
+                if 0 <= outlet < len(self.outlets):
+                    if self.outlets[outlet] != on:
+                        self.history.append((now, outlet, on))
+                    self.outlets[outlet] = on
+
+    def power_cycles(self, outlet, since=0.0):
+        """
+        Return how many times an outlet was switched back on after being off,
+        counting the state changes after the time.monotonic() value since. An
+        outlet already off at since counts once when switched on.
+        """
+        with self._lock:
+            changes = [
+                (when, on) for when, number, on in self.history if number == outlet
+            ]
+        state = True  # Outlets are on at start
+        cycles = 0
+        for when, on in changes:
+            if when >= since and on and not state:
+                cycles += 1
+            state = on
+        return cycles
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local HTTP stand-in for a Lindy or UT lab power switch"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--outlets", type=int, default=24)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds before answering"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="random extra latency, seconds"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction answered with 503"
+    )
+    parser.add_argument(
+        "--hang-rate", type=float, default=0.0, help="fraction never answered"
+    )
+    parser.add_argument("--hang-time", type=float, default=30.0)
+    args = parser.parse_args()
+
+    simulator = PowerSwitchSimulator(
+        args.host,
+        args.port,
+        outlets=args.outlets,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        hang_rate=args.hang_rate,
+        hang_time=args.hang_time,
+    )
+    print(f"Power switch simulator listening on {simulator.address}")
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator._stopped.set()
+        simulator.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
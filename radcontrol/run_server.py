@@ -1,7 +1,13 @@
 import argparse
+import os
 import sys
-from .host.server import Server
-from file_manager import load_config, add_arguments_from_config, get_dut_info
+from .utils.log_converter import add_convert_arguments, convert_logs
+from file_manager import load_config, add_arguments_from_config
+
+# Shipped with the package, so every subcommand runs from any directory
+SERVER_CONFIG = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "server_config.yaml"
+)
 
 
 def in_venv():
@@ -11,6 +17,9 @@ def in_venv():
 
 
 def start_server(args):
+    # Imported here so the other subcommands start without the server stack
+    from .host.server import Server
+
     server = Server(args=args)
     # Assuming some signal to stop the server, for example, a keyboard interrupt
     try:
@@ -35,7 +44,7 @@ def run():
     )
 
     # Load configuration
-    config = load_config("server_config.yaml")
+    config = load_config(SERVER_CONFIG)
 
     # Setup parser
     parser = argparse.ArgumentParser(description=_description, epilog=_epilog)
@@ -46,14 +55,18 @@ def run():
     # Dynamically add arguments from config
     add_arguments_from_config(parser, config)
 
+    # Subcommands, the server is started when none is given
+    subparsers = parser.add_subparsers(title="commands")
+    convert_parser = subparsers.add_parser(
+        "convert",
+        help="Convert DUT hex text logs to binary capture or columnar files",
+    )
+    add_convert_arguments(convert_parser)
+    convert_parser.set_defaults(func=convert_logs)
+
     # Parse arguments and start server
     args = parser.parse_args()
 
-    # Get UART info
-    dut_config = get_dut_info("dut_config.yaml")
-    # print(dut_config)
-    args.uart_info = dut_config
-
     # Start process (Server)
     if args.func:
         args.func(args)
@@ -0,0 +1,193 @@
+import os
+import struct
+import time
+from collections import namedtuple
+from datetime import datetime
+
+CAPTURE_MAGIC = b"RADCAP01"
+
+# magic, wall clock (ns since epoch) and monotonic clock (ns) at file creation
+FILE_HEADER = struct.Struct("<8sQQ")
+# monotonic timestamp (ns), status flags, frame length
+RECORD_HEADER = struct.Struct("<QBH")
+
+# Record status flags
+CAPTURE_FLAG_CRC_ERROR = 0x01
+
+CaptureRecord = namedtuple("CaptureRecord", ["timestamp", "flags", "frame"])
+
+
+class CaptureWriter:
+    """
+    Append-only binary capture of the frames received from a DUT.
+
+    Each file starts with a header anchoring the monotonic clock to the wall
+    clock, followed by one record per frame: monotonic timestamp, status flags,
+    length and the raw frame bytes. Files live next to the text logs, are named
+    the same way (``<name>_<timestamp>.cap``, with a ``_<n>`` suffix when that
+    name is taken) and rotate on the same interval as
+    CustomTimedRotatingFileHandler.
+
+    A file is opened on the first write and closed by ``close``, so every
+    monitoring run starts a new file.
+
+    Args:
+        name (str): DUT name, used for the folder and file names.
+        log_folder (str): The folder where capture files will be stored.
+        rotate_interval (int): Minutes after which a new file is started.
+        flush_interval (float): Seconds between flushes to the OS, 0 flushes
+            every record.
+        fsync (bool): Also fsync the file on every flush.
+        buffer_size (int): Size of the write buffer in bytes.
+    """
+
+    def __init__(
+        self,
+        name,
+        log_folder="logs",
+        rotate_interval=10,
+        flush_interval=1.0,
+        fsync=False,
+        buffer_size=64 * 1024,
+    ):
+        self.name = name
+        self.folder = os.path.join(log_folder, name)
+        self.rotate_interval_ns = int(rotate_interval * 60e9)
+        self.flush_interval_ns = int(flush_interval * 1e9)
+        self.fsync = fsync
+        self.buffer_size = buffer_size
+
+        self.filename = None
+        self._file = None
+        self._rollover_at = 0
+        self._flush_at = 0
+
+    def _open(self, now):
+        os.makedirs(self.folder, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        # Names have a one-second resolution, a file reopened within the same
+        # second gets a suffix rather than a second header mid-file
+        stem = os.path.join(self.folder, f"{self.name}_{timestamp}")
+        self.filename = f"{stem}.cap"
+        count = 0
+        while True:
+            try:
+                self._file = open(self.filename, "xb", buffering=self.buffer_size)
+                break
+            except FileExistsError:
+                count += 1
+                self.filename = f"{stem}_{count}.cap"
+        # Both clocks read together, now may be the past reception time
+        self._file.write(
+            FILE_HEADER.pack(CAPTURE_MAGIC, time.time_ns(), time.monotonic_ns())
+        )
+        self._rollover_at = now + self.rotate_interval_ns
+        self._flush_at = now + self.flush_interval_ns
+
+    def write(self, frame, flags=0, timestamp=None):
+        """
+        Append a frame to the capture.
+
+        Args:
+            frame (bytes): The complete frame.
+            flags (int): Status flags (CAPTURE_FLAG_*).
+            timestamp (int): time.monotonic_ns() of the reception, defaults
+                to now.
+        """
+        now = time.monotonic_ns() if timestamp is None else timestamp
+        if self._file is None:
+            self._open(now)
+        elif now >= self._rollover_at:
+            self.close()
+            self._open(now)
+
+        self._file.write(RECORD_HEADER.pack(now, flags, len(frame)))
+        self._file.write(frame)
+
+        if now >= self._flush_at:
+            self.flush()
+            self._flush_at = now + self.flush_interval_ns
+
+    def flush(self):
+        """
+        Flush buffered records to the OS, and to disk if fsync is enabled.
+        """
+        if self._file is None:
+            return
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """
+        Flush and close the current file.
+        """
+        if self._file is None:
+            return
+        self.flush()
+        self._file.close()
+        self._file = None
+
+
+def read_capture(path):
+    """
+    Iterate over the records of a capture file.
+
+    A record truncated by a crash at the end of the file is ignored.
+
+    Args:
+        path (str): Path to the capture file.
+
+    Yields:
+        CaptureRecord: Wall clock timestamp (seconds since epoch), status
+        flags and frame bytes.
+
+    Raises:
+        ValueError: If the file is not a capture file.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+
+    if len(data) < FILE_HEADER.size:
+        raise ValueError(f"{path} is not a capture file")
+    magic, wall_ns, monotonic_ns = FILE_HEADER.unpack_from(data)
+    if magic != CAPTURE_MAGIC:
+        raise ValueError(f"{path} is not a capture file")
+
+    offset = FILE_HEADER.size
+    end = len(data)
+    while offset + RECORD_HEADER.size <= end:
+        timestamp, flags, length = RECORD_HEADER.unpack_from(data, offset)
+        offset += RECORD_HEADER.size
+        if offset + length > end:
+            break
+        yield CaptureRecord(
+            (wall_ns + timestamp - monotonic_ns) / 1e9,
+            flags,
+            data[offset : offset + length],
+        )
+        offset += length
+
+
+def write_capture(path, records):
+    """
+    Write records with known wall clock timestamps to a new capture file, e.g.
+    when converting text logs.
+
+    Args:
+        path (str): Path of the capture file to create.
+        records (iterable): (timestamp, flags, frame) tuples, timestamp in
+            seconds since epoch.
+
+    Returns:
+        int: Number of records written.
+    """
+    count = 0
+    with open(path, "wb", buffering=64 * 1024) as file:
+        # Anchoring both clocks at zero makes record timestamps wall clock time
+        file.write(FILE_HEADER.pack(CAPTURE_MAGIC, 0, 0))
+        for timestamp, flags, frame in records:
+            file.write(RECORD_HEADER.pack(round(timestamp * 1e9), flags, len(frame)))
+            file.write(frame)
+            count += 1
+    return count
@@ -0,0 +1,166 @@
+import glob
+import os
+import re
+import struct
+import time
+from datetime import datetime
+
+# Optional dependency, only needed by the columnar store and imported on first use
+np = None
+
+_FORMAT_TOKEN = re.compile(r"(\d*)([xcbB?hHiIlLqQnNefdspP])")
+_INTEGER_KINDS = {"b": "i", "h": "i", "i": "i", "l": "i", "q": "i", "n": "i"}
+_INTEGER_KINDS.update({k.upper(): "u" for k in _INTEGER_KINDS})
+_INTEGER_KINDS["P"] = "u"
+
+
+def _require_numpy():
+    global np
+    if np is not None:
+        return
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            "The columnar store needs numpy, install it with: pip install numpy"
+        )
+    np = numpy
+
+
+def struct_to_dtype(format_str):
+    """
+    Build the numpy row type matching a struct format string.
+
+    The row starts with a ``timestamp`` column (float64, seconds since epoch)
+    followed by one column per unpacked value, named ``f0``, ``f1``...
+
+    Args:
+        format_str (str): struct format string from frame_id_formatting.yaml.
+
+    Returns:
+        numpy.dtype: The structured row type.
+    """
+    _require_numpy()
+    prefix = format_str[0] if format_str[:1] in ("@", "=", "<", ">", "!") else ""
+    fields = [("timestamp", "f8")]
+
+    for count, char in _FORMAT_TOKEN.findall(format_str):
+        count = int(count) if count else 1
+        if char == "x":
+            continue
+        if char in ("s", "p"):
+            fields.append((f"f{len(fields) - 1}", f"S{count}"))
+            continue
+
+        if char == "c":
+            column = "S1"
+        elif char == "?":
+            column = "?"
+        elif char in ("e", "f", "d"):
+            column = f"f{struct.calcsize(prefix + char)}"
+        else:
+            column = f"{_INTEGER_KINDS[char]}{struct.calcsize(prefix + char)}"
+        for _ in range(count):
+            fields.append((f"f{len(fields) - 1}", column))
+
+    return np.dtype(fields)
+
+
+class ColumnarSink:
+    """
+    Decode frames and store their values in per frame ID columnar files.
+
+    Rows are buffered in memory per frame ID and written as chunked ``.npy``
+    files under ``<log_folder>/<name>/columns/frame_<id>/``, which can later be
+    memory-mapped with ``load_columns`` instead of re-parsing logs.
+
+    Args:
+        name (str): DUT name, used for the folder name.
+        registry (DecoderRegistry): Decoders for the frame IDs.
+        log_folder (str): The folder where the columns will be stored.
+        chunk_rows (int): Rows per frame ID kept in memory before a chunk is
+            written.
+        prefix (str): Chunk file name prefix, defaults to the creation time.
+    """
+
+    def __init__(
+        self, name, registry, log_folder="logs", chunk_rows=65536, prefix=None
+    ):
+        _require_numpy()
+        self.folder = os.path.join(log_folder, name, "columns")
+        self.registry = registry
+        self.chunk_rows = chunk_rows
+        self.prefix = prefix or datetime.now().strftime("%Y%m%d-%H%M%S")
+        self.rejected = 0  # Frames without format or with a wrong length
+
+        self._rows = {}
+        self._dtypes = {}
+        self._chunks = {}
+
+    def write(self, frame_id, payload, timestamp=None):
+        """
+        Decode a payload and append its values to the columns of its frame ID.
+
+        Args:
+            frame_id (int): The frame ID.
+            payload (bytes): The frame payload.
+            timestamp (float): Seconds since epoch, defaults to now.
+        """
+        try:
+            values = self.registry.decode(frame_id, payload)
+        except ValueError:
+            self.rejected += 1
+            return
+
+        rows = self._rows.get(frame_id)
+        if rows is None:
+            rows = self._rows[frame_id] = []
+        rows.append((time.time() if timestamp is None else timestamp,) + values)
+        if len(rows) >= self.chunk_rows:
+            self._write_chunk(frame_id)
+
+    def _write_chunk(self, frame_id):
+        rows = self._rows.pop(frame_id, None)
+        if not rows:
+            return
+
+        dtype = self._dtypes.get(frame_id)
+        if dtype is None:
+            dtype = self._dtypes[frame_id] = struct_to_dtype(
+                self.registry.formats[frame_id]
+            )
+
+        folder = os.path.join(self.folder, f"frame_{frame_id:03d}")
+        os.makedirs(folder, exist_ok=True)
+        index = self._chunks.get(frame_id, 0)
+        self._chunks[frame_id] = index + 1
+        path = os.path.join(folder, f"{self.prefix}_{index:06d}.npy")
+        np.save(path, np.array(rows, dtype=dtype))
+
+    def flush(self):
+        """
+        Write the rows buffered for every frame ID.
+        """
+        for frame_id in list(self._rows):
+            self._write_chunk(frame_id)
+
+    def close(self):
+        self.flush()
+
+
+def load_columns(folder, frame_id, mmap_mode="r"):
+    """
+    Load the chunks stored for a frame ID, memory-mapped by default.
+
+    Args:
+        folder (str): The ``columns`` folder of a DUT, e.g. logs/dut1/columns.
+        frame_id (int): The frame ID.
+        mmap_mode (str): Passed to numpy.load, None reads the chunks into memory.
+
+    Returns:
+        list: One structured array per chunk, in write order. Use
+        numpy.concatenate to join them.
+    """
+    _require_numpy()
+    pattern = os.path.join(folder, f"frame_{frame_id:03d}", "*.npy")
+    return [np.load(path, mmap_mode=mmap_mode) for path in sorted(glob.glob(pattern))]
@@ -0,0 +1,49 @@
+import os
+import threading
+
+# Maps (absolute path, loader) to ((mtime_ns, size), loaded value)
+_cache = {}
+_lock = threading.Lock()
+
+
+def load_cached(path, loader):
+    """
+    Load a configuration file through loader, caching the result until the
+    file changes.
+
+    The cache is keyed by absolute path and loader, and validated against the
+    file modification time and size, so the file is parsed (and compiled, for
+    loaders returning compiled objects) on first use and again only after it
+    was edited.
+
+    Args:
+        path (str): Path to the configuration file.
+        loader (callable): Called with the absolute path, returns the loaded
+            value.
+
+    Returns:
+        The value returned by loader. It is shared between callers, do not
+        modify it.
+
+    Raises:
+        OSError: If the file cannot be accessed.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    key = (path, loader)
+
+    with _lock:
+        entry = _cache.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    value = loader(path)
+    with _lock:
+        _cache[key] = (version, value)
+    return value
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
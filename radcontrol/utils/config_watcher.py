@@ -0,0 +1,148 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+
+# inotify event masks, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+
+def _load_inotify():
+    # libc inotify functions, None where they are not available (e.g. macOS)
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class ConfigWatcher:
+    """
+    Watch configuration files and call back when one of them changes.
+
+    Uses inotify on the folders of the files, so edits are seen whether the
+    editor rewrites the file or replaces it, and falls back to polling the
+    modification times where inotify is not available. Bursts of events are
+    debounced into a single call.
+
+    Args:
+        paths (list): Files to watch.
+        callback (callable): Called with the path of a changed file, from the
+            watcher thread.
+        debounce (float): Seconds without events before calling back.
+        poll_interval (float): Seconds between checks when polling.
+    """
+
+    def __init__(self, paths, callback, debounce=0.2, poll_interval=1.0):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.backend = None  # "inotify" or "polling" once started
+
+        self.thread = None
+        self._stop_event = threading.Event()
+        self._versions = {path: self._version(path) for path in self.paths}
+
+    @staticmethod
+    def _version(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def start(self):
+        fd = self._init_inotify()
+        if fd is None:
+            self.backend = "polling"
+            target, args = self._poll, ()
+        else:
+            self.backend = "inotify"
+            target, args = self._watch, (fd,)
+        self.thread = threading.Thread(target=target, args=args, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+
+    def _init_inotify(self):
+        libc = _load_inotify()
+        if libc is None:
+            return None
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+
+        self._watches = {}  # Maps watch descriptors to folders
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+        for folder in {os.path.dirname(path) for path in self.paths}:
+            wd = libc.inotify_add_watch(fd, os.fsencode(folder), mask)
+            if wd < 0:
+                os.close(fd)
+                return None
+            self._watches[wd] = folder
+        return fd
+
+    def _watch(self, fd):
+        pending = {}  # Maps changed paths to the time of their last event
+        try:
+            while not self._stop_event.is_set():
+                timeout = self.debounce if pending else 0.5
+                if select.select([fd], [], [], timeout)[0]:
+                    now = time.monotonic()
+                    for path in self._read_events(fd):
+                        pending[path] = now
+
+                now = time.monotonic()
+                for path, last_event in list(pending.items()):
+                    if now - last_event >= self.debounce:
+                        del pending[path]
+                        self._changed(path)
+        finally:
+            os.close(fd)
+
+    def _read_events(self, fd):
+        try:
+            data = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            path = os.path.join(self._watches.get(wd, ""), os.fsdecode(name))
+            if path in self._versions:
+                yield path
+
+    def _poll(self):
+        while not self._stop_event.wait(self.poll_interval):
+            for path in self.paths:
+                self._changed(path)
+
+    def _changed(self, path):
+        # One call per new version of the file, however many events it took
+        version = self._version(path)
+        if version is None or version == self._versions[path]:
+            return
+        self._versions[path] = version
+        self.callback(path)
@@ -0,0 +1,192 @@
+import glob
+import os
+import sys
+import time
+from radcontrol.frame.crc import check_frame_crc
+from radcontrol.frame.decoder_registry import DecoderRegistry
+from radcontrol.frame.frame_decoder import DEFAULT_FRAME_FORMAT
+from radcontrol.utils.capture import write_capture, CAPTURE_FLAG_CRC_ERROR
+from radcontrol.utils.columnar import ColumnarSink
+from radcontrol.utils.config_cache import load_cached
+from radcontrol.utils.log_index import line_timestamp
+from radcontrol.utils.repeat_log import parse_repeat
+
+
+def parse_log(path):
+    """
+    Parse the frames out of a DUT text log.
+
+    Lines look like ``2024-10-25 13:37:23,123 [   DEBUG] [  dut1] aa01...55``;
+    lines whose message is not a hex frame (events, errors) are skipped. Repeat
+    records written with collapse_repeats are expanded back into one frame per
+    repeat, spread evenly between the first and last reception time.
+
+    Args:
+        path (str): Path to the log file.
+
+    Yields:
+        tuple: (timestamp, frame) with timestamp in seconds since epoch.
+    """
+    cache = {}
+    with open(path, "rb") as file:
+        for line in file:
+            _, separator, message = line.rpartition(b"] ")
+            if not separator:
+                continue
+            try:
+                frame = bytes.fromhex(message.decode("ascii"))
+            except (ValueError, UnicodeDecodeError):
+                repeat = parse_repeat(message)
+                if repeat is not None:
+                    yield from _expand_repeat(*repeat)
+                continue
+            if len(frame) < 6:
+                continue
+
+            timestamp = line_timestamp(line, cache)
+            if timestamp is not None:
+                yield timestamp, frame
+
+
+def _expand_repeat(frame, count, first, last):
+    if len(frame) < 6:
+        return
+    step = (last - first) / (count - 1) if count > 1 else 0
+    for index in range(count):
+        yield first + index * step, frame
+
+
+def convert_file(path, output, output_format, frame_format):
+    """
+    Convert one text log into a capture file or columnar chunks.
+
+    Args:
+        path (str): Path to the log file, in a folder named after the DUT.
+        output (str): Output folder, files go to ``<output>/<dut>/``.
+        output_format (str): "capture" or "columnar".
+        frame_format (str): Path to frame_id_formatting.yaml.
+
+    Returns:
+        dict: Conversion statistics for this file.
+    """
+    # Compiled once per worker process
+    registry = load_cached(frame_format, DecoderRegistry.from_yaml)
+
+    dut = os.path.basename(os.path.dirname(os.path.abspath(path)))
+    stem = os.path.splitext(os.path.basename(path))[0]
+    stats = {
+        "path": path,
+        "bytes": os.path.getsize(path),
+        "frames": 0,
+        "crc_errors": 0,
+        "rejected": 0,
+    }
+
+    def records():
+        for timestamp, frame in parse_log(path):
+            stats["frames"] += 1
+            if len(frame) != frame[2] + 6:
+                stats["rejected"] += 1
+                continue
+            if check_frame_crc(frame):
+                yield timestamp, 0, frame
+            else:
+                stats["crc_errors"] += 1
+                yield timestamp, CAPTURE_FLAG_CRC_ERROR, frame
+
+    folder = os.path.join(output, dut)
+    os.makedirs(folder, exist_ok=True)
+    if output_format == "capture":
+        write_capture(os.path.join(folder, f"{stem}.cap"), records())
+    else:
+        sink = ColumnarSink(dut, registry, log_folder=output, prefix=stem)
+        for timestamp, flags, frame in records():
+            if not flags:
+                sink.write(frame[1], frame[3:-3], timestamp)
+        sink.close()
+        stats["rejected"] += sink.rejected
+
+    return stats
+
+
+def find_logs(paths):
+    """
+    Expand files and folders into the list of log files to convert.
+    """
+    logs = []
+    for path in paths:
+        if os.path.isdir(path):
+            logs.extend(glob.glob(os.path.join(path, "**", "*.log"), recursive=True))
+        else:
+            logs.append(path)
+    return sorted(logs)
+
+
+def add_convert_arguments(parser):
+    parser.add_argument(
+        "paths", nargs="+", help="Log files or folders (e.g. logs) to convert"
+    )
+    parser.add_argument(
+        "--output", default="converted", help="Folder to write the converted files to"
+    )
+    parser.add_argument(
+        "--format",
+        dest="output_format",
+        choices=["capture", "columnar"],
+        default="capture",
+        help="Binary capture files or per frame ID columnar chunks (needs numpy)",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=os.cpu_count(), help="Number of worker processes"
+    )
+    parser.add_argument(
+        "--frame-format",
+        default=DEFAULT_FRAME_FORMAT,
+        help="Frame ID formatting file used to decode payloads",
+    )
+
+
+def convert_logs(args):
+    """
+    Convert rotated DUT text logs across a process pool, reporting progress.
+    """
+    # Imported here, multiprocessing is only needed once converting starts
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    logs = find_logs(args.paths)
+    if not logs:
+        sys.exit("No log files found")
+    frame_format = os.path.abspath(args.frame_format)
+
+    total_bytes = sum(os.path.getsize(log) for log in logs)
+    done_bytes = 0
+    totals = {"frames": 0, "crc_errors": 0, "rejected": 0}
+    start = time.monotonic()
+
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [
+            executor.submit(
+                convert_file, log, args.output, args.output_format, frame_format
+            )
+            for log in logs
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            stats = future.result()
+            done_bytes += stats["bytes"]
+            for key in totals:
+                totals[key] += stats[key]
+
+            elapsed = time.monotonic() - start
+            rate = done_bytes / elapsed if elapsed else 0
+            eta = (total_bytes - done_bytes) / rate if rate else 0
+            print(
+                f"[{done}/{len(logs)}] {stats['path']}: {stats['frames']} frames | "
+                f"{rate / 1e6:.1f} MB/s, ETA {eta:.0f}s",
+                flush=True,
+            )
+
+    print(
+        f"Converted {len(logs)} files ({total_bytes / 1e6:.1f} MB) in "
+        f"{time.monotonic() - start:.1f}s: {totals['frames']} frames, "
+        f"{totals['crc_errors']} CRC errors, {totals['rejected']} rejected"
+    )
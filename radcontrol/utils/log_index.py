@@ -0,0 +1,228 @@
+import glob
+import json
+import mmap
+import os
+import time
+from radcontrol.utils.repeat_log import parse_repeat
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx"
+BLOCK_SIZE = 64 * 1024  # Bytes of log lines summarized by one index entry
+
+
+def line_timestamp(line, cache):
+    """
+    Timestamp of a log line, ``2024-10-25 13:37:23,123 [...] ...``.
+
+    Args:
+        line (bytes): The log line.
+        cache (dict): Maps already seen seconds to their epoch, share it
+            between calls on the same file.
+
+    Returns:
+        float: Seconds since epoch, None if the line has no timestamp.
+    """
+    second = line[:19]
+    epoch = cache.get(second)
+    if epoch is None:
+        try:
+            epoch = time.mktime(time.strptime(second.decode(), "%Y-%m-%d %H:%M:%S"))
+        except (ValueError, UnicodeDecodeError):
+            return None
+        cache[second] = epoch
+    try:
+        return epoch + int(line[20:23]) / 1000
+    except ValueError:
+        return None
+
+
+def line_time_range(line, cache):
+    """
+    Time span covered by a log line: a repeat record covers the repeats since
+    its first one, any other line only its own timestamp.
+
+    Returns:
+        tuple: (first, last) in seconds since epoch, both None if the line has
+        no timestamp.
+    """
+    timestamp = line_timestamp(line, cache)
+    if timestamp is None or b" *" not in line:
+        return timestamp, timestamp
+    repeat = parse_repeat(line[line.rfind(b"] ") + 2 :])
+    if repeat is None:
+        return timestamp, timestamp
+    return min(repeat[2], timestamp), timestamp
+
+
+def line_frame_id(line):
+    """
+    Frame ID of a hex frame log line, None for other lines.
+    """
+    message = line[line.rfind(b"] ") + 2 :]
+    if message[:2] != b"aa" or len(message) < 12:
+        return None
+    try:
+        return int(message[2:4], 16)
+    except ValueError:
+        return None
+
+
+def _index_path(path):
+    return path + INDEX_SUFFIX
+
+
+def _load_index(path):
+    try:
+        with open(_index_path(path), "r") as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != INDEX_VERSION:
+        return None
+    return index
+
+
+def build_index(path, save=True):
+    """
+    Build or extend the sidecar index of a log file.
+
+    The file is summarized in blocks of about BLOCK_SIZE bytes, cut at line
+    boundaries. Each block records its byte range, the time span of its lines
+    (repeat records reach back to their first repeat) and a bitmask of the
+    frame IDs logged in it. An existing index is extended from where it
+    stopped, so indexing a growing file is incremental.
+
+    Args:
+        path (str): Path to the log file.
+        save (bool): Write the index next to the log as ``<path>.idx``.
+
+    Returns:
+        dict: The index.
+    """
+    index = _load_index(path)
+    if index is None or index["size"] > os.path.getsize(path):
+        index = {"version": INDEX_VERSION, "size": 0, "blocks": []}
+
+    cache = {}
+    blocks = index["blocks"]
+    with open(path, "rb") as file:
+        file.seek(index["size"])
+        offset = index["size"]
+        block = None
+        for line in file:
+            if not line.endswith(b"\n"):
+                break  # Partially written line, picked up next time
+            first, timestamp = line_time_range(line, cache)
+            if block is None:
+                block = [offset, offset, first, timestamp, 0]
+            offset += len(line)
+            block[1] = offset
+            if timestamp is not None:
+                if block[2] is None or first < block[2]:
+                    block[2] = first
+                block[3] = timestamp
+            frame_id = line_frame_id(line)
+            if frame_id is not None:
+                block[4] |= 1 << frame_id
+
+            if offset - block[0] >= BLOCK_SIZE:
+                blocks.append(block[:4] + [format(block[4], "x")])
+                block = None
+        if block is not None:
+            blocks.append(block[:4] + [format(block[4], "x")])
+
+    index["size"] = offset
+    if save:
+        with open(_index_path(path), "w") as file:
+            json.dump(index, file, separators=(",", ":"))
+    return index
+
+
+def _epoch(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return value.timestamp()
+
+
+class LogIndex:
+    """
+    Query the rotated text logs of a DUT by time range and frame ID.
+
+    Uses the sidecar indexes written at rotation time, and indexes files
+    missing one (e.g. the file being written) on the fly. Only the blocks
+    overlapping the query are read, through a memory map of the log.
+
+    Args:
+        folder (str): The log folder of a DUT, e.g. logs/dut1.
+
+    Example:
+        index = LogIndex("logs/dut1")
+        for timestamp, line in index.query(
+            datetime(2024, 10, 25, 14, 2), datetime(2024, 10, 25, 14, 5), frame_ids=[3]
+        ):
+            print(line.decode().rstrip())
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def files(self):
+        return sorted(glob.glob(os.path.join(self.folder, "*.log")))
+
+    def _file_index(self, path):
+        index = _load_index(path)
+        if index is None or index["size"] != os.path.getsize(path):
+            index = build_index(path)
+        return index
+
+    def query(self, start=None, end=None, frame_ids=None):
+        """
+        Iterate over the log lines within a time range and/or of given frame IDs.
+
+        Args:
+            start (datetime or float): Earliest time included, None for no limit.
+            end (datetime or float): Latest time included, None for no limit.
+            frame_ids (iterable): Frame IDs to return, None returns every line,
+                frames and events alike.
+
+        Yields:
+            tuple: (timestamp, line) with timestamp in seconds since epoch and
+            line as bytes.
+        """
+        start, end = _epoch(start), _epoch(end)
+        mask = None
+        if frame_ids is not None:
+            frame_ids = set(frame_ids)
+            mask = 0
+            for frame_id in frame_ids:
+                mask |= 1 << frame_id
+
+        for path in self.files():
+            index = self._file_index(path)
+            blocks = [
+                block
+                for block in index["blocks"]
+                if not (start is not None and block[3] is not None and block[3] < start)
+                and not (end is not None and block[2] is not None and block[2] > end)
+                and (mask is None or int(block[4], 16) & mask)
+            ]
+            if not blocks:
+                continue
+            yield from self._read_blocks(path, blocks, start, end, frame_ids)
+
+    def _read_blocks(self, path, blocks, start, end, frame_ids):
+        cache = {}
+        with open(path, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            for block in blocks:
+                for line in data[block[0] : block[1]].splitlines(keepends=True):
+                    first, timestamp = line_time_range(line, cache)
+                    if timestamp is not None:
+                        if start is not None and timestamp < start:
+                            continue
+                        if end is not None and first > end:
+                            continue
+                    if frame_ids is not None and line_frame_id(line) not in frame_ids:
+                        continue
+                    yield timestamp, line
@@ -5,10 +5,16 @@ import pty
 import os
 import sys
 import time
+import threading
+import queue
+import atexit
+from collections import deque
+from itertools import islice
 import coloredlogs
 from logging import StreamHandler
-from logging.handlers import TimedRotatingFileHandler
+from logging.handlers import BaseRotatingHandler, TimedRotatingFileHandler
 from datetime import datetime
+from radcontrol.utils.log_index import build_index
 
 
 class CustomTimedRotatingFileHandler(TimedRotatingFileHandler):
@@ -31,6 +37,12 @@ class CustomTimedRotatingFileHandler(TimedRotatingFileHandler):
         """
         currentTime = int(time.time())
         self.stream.close()
+
+        # Index the closed file in the background, queries then only read the
+        # regions they need
+        threading.Thread(
+            target=build_index, args=(self.baseFilename,), daemon=True
+        ).start()
         # Calculate the new rollover time
         newRolloverAt = self.computeRollover(currentTime)
 
@@ -47,6 +59,211 @@ class CustomTimedRotatingFileHandler(TimedRotatingFileHandler):
         self.rolloverAt = newRolloverAt
 
 
+class QueuedLogWriter:
+    """
+    Single background thread writing the log records of every queued Logger.
+
+    Queued loggers only put their records on a queue. This thread drains it in
+    batches, formats the records, handles file rotation and writes all lines
+    of a batch going to the same handler with one write and one flush.
+    """
+
+    MAX_BATCH = 1024  # Records drained per wake-up
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        """
+        Return the shared writer, starting it on first use.
+        """
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        self.queue = queue.SimpleQueue()
+        self.routes = {}  # Maps logger names to their handlers
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def register(self, name, handlers):
+        """
+        Route the records of a logger to its handlers.
+        """
+        self.routes[name] = list(handlers)
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            try:
+                while len(batch) < self.MAX_BATCH:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            if None in batch:  # Exit signal, write what came before it
+                self._write(batch[: batch.index(None)])
+                break
+            self._write(batch)
+
+    def _write(self, batch):
+        pending = {}  # Maps handlers to their formatted lines
+        last_records = {}  # Maps handlers to the last record of their lines
+        for record in batch:
+            for handler in self.routes.get(record.name, ()):
+                if record.levelno < handler.level:
+                    continue
+                if not isinstance(handler, StreamHandler) or handler.filters:
+                    handler.handle(record)
+                    continue
+                if isinstance(handler, BaseRotatingHandler) and handler.shouldRollover(
+                    record
+                ):
+                    self._flush(
+                        handler, pending.pop(handler, []), last_records.get(handler)
+                    )
+                    handler.doRollover()
+                try:
+                    line = handler.format(record) + handler.terminator
+                except Exception:
+                    handler.handleError(record)
+                    continue
+                pending.setdefault(handler, []).append(line)
+                last_records[handler] = record
+
+        for handler, lines in pending.items():
+            self._flush(handler, lines, last_records[handler])
+
+    def _flush(self, handler, lines, record):
+        if not lines:
+            return
+        handler.acquire()
+        try:
+            handler.stream.write("".join(lines))
+            handler.flush()
+        except Exception:
+            # Reported like a failed emit, the other handlers still get written
+            handler.handleError(record)
+        finally:
+            handler.release()
+
+    def stop(self):
+        """
+        Write the queued records and stop the writer thread.
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+
+
+class _EnqueueHandler(logging.Handler):
+    """
+    Handler putting records on the QueuedLogWriter queue, without formatting.
+    """
+
+    def __init__(self, writer):
+        super().__init__()
+        self.writer = writer
+
+    def emit(self, record):
+        self.writer.queue.put(record)
+
+
+class ConsoleSink:
+    """
+    Non-blocking stream for the master side of a DUT console PTY.
+
+    Lines are written to the PTY without ever blocking. When nobody reads the
+    console and the kernel buffer is full, they wait in a bounded ring, one
+    entry per line whatever the number of lines per write; once the ring is
+    full the oldest lines are dropped and counted. When the reader catches up,
+    a note with the number of dropped lines is written.
+
+    Args:
+        fd (int): File descriptor of the PTY master.
+        max_lines (int): Lines kept while the console is not read, at least 2:
+            the line partly written to the console and the newest one.
+
+    Raises:
+        ValueError: If max_lines is lower than 2.
+    """
+
+    DRAIN_LINES = 1024
+
+    def __init__(self, fd, max_lines=10000):
+        if max_lines < 2:
+            raise ValueError(f"max_lines must be at least 2, got {max_lines}")
+        os.set_blocking(fd, False)
+        self.fd = fd
+        self.max_lines = max_lines
+        self.dropped = 0  # Lines dropped since the sink was created
+
+        self._pending = deque()
+        self._head_written = 0  # Bytes of the first pending line already written
+        self._gap = 0  # Lines dropped since the last note
+        self._lock = threading.Lock()
+
+    def write(self, text):
+        # A write may carry many lines, e.g. a batch of the QueuedLogWriter
+        lines = text.encode(errors="replace").splitlines(keepends=True)
+        with self._lock:
+            self._pending.extend(lines)
+            self._drain()
+            excess = len(self._pending) - self.max_lines
+            if excess > 0:
+                # Never cut a line that is partly on the console already
+                head = self._pending.popleft() if self._head_written else None
+                for _ in range(excess):
+                    self._pending.popleft()
+                if head is not None:
+                    self._pending.appendleft(head)
+                self.dropped += excess
+                self._gap += excess
+        return len(text)
+
+    def _drain(self):
+        while self._pending:
+            # Up to DRAIN_LINES lines per system call
+            data = b"".join(islice(self._pending, self.DRAIN_LINES))
+            try:
+                written = os.write(self.fd, data[self._head_written :])
+            except BlockingIOError:
+                return
+            except OSError:
+                # Console gone for good, keep acquisition going
+                self.dropped += len(self._pending)
+                self._pending.clear()
+                self._head_written = 0
+                return
+            written += self._head_written
+            while self._pending and written >= len(self._pending[0]):
+                written -= len(self._pending.popleft())
+            self._head_written = written
+            if self._head_written:
+                return  # The console took part of a line, it is full
+
+        if self._gap:
+            self._pending.append(
+                f"--- {self._gap} console lines dropped while the console was not read ---\n".encode()
+            )
+            self._gap = 0
+            self._drain()
+
+    def flush(self):
+        with self._lock:
+            self._drain()
+
+    def isatty(self):
+        return True
+
+    def fileno(self):
+        return self.fd
+
+
 class Logger:
     """
     A custom logging class to handle logging for both console and file outputs with log rotation.
@@ -58,6 +275,8 @@ class Logger:
         streamHandler (logging.Handler): The handler for writing log messages to the console.
         dataLogger (logging.Logger): The logger instance for file output.
         consoleLogger (logging.Logger): The logger instance for console output.
+        consoleSink (ConsoleSink): The dedicated console stream, with its dropped
+            line counter. None when logging to stdout.
 
     Args:
         mode (Literal['DUT', 'Server']): Specifies the mode of the logger, used in log file naming.
@@ -68,6 +287,10 @@ class Logger:
             2 - INFO level for console, DEBUG level for file
             3 - DEBUG level for both console and file
         log_rotate_interval (int): The interval (in minutes) at which the log files will be rotated.
+        queued (bool): Only enqueue records on the calling thread and leave formatting
+            and writing to the shared QueuedLogWriter thread.
+        console_buffer_lines (int): Lines kept for a dedicated console that is not
+            read before the oldest are dropped.
 
     Example:
         logger = Logger(mode='Server', verbose=2)
@@ -85,9 +308,14 @@ class Logger:
         log_folder: str = "logs",
         verbose=2,
         log_rotate_interval=10,
+        queued=False,
+        console_buffer_lines=10000,
     ):
 
         self.name = mode
+        self.log_rotate_interval = log_rotate_interval
+        self.console_buffer_lines = console_buffer_lines
+        self.consoleSink = None
         self.setup_folder_file(log_folder)
         self.setup_level(verbose)
 
@@ -97,6 +325,31 @@ class Logger:
         else:
             self.stream_handler_dedicated()
 
+        if queued:
+            self.queue_handlers()
+        else:
+            # Left by a queued logger of the same name, e.g. a re-added DUT
+            for handler in self._enqueue_handlers():
+                self.dataLogger.removeHandler(handler)
+
+    def _enqueue_handlers(self):
+        return [h for h in self.dataLogger.handlers if isinstance(h, _EnqueueHandler)]
+
+    def queue_handlers(self):
+        # Hand the handlers over to the background writer, the logger itself
+        # only enqueues records from now on. Loggers are shared by name, so the
+        # handlers of a logger created again for a name replace the routes of
+        # the previous one, whose enqueue handler is kept
+        writer = QueuedLogWriter.get()
+        queued = self._enqueue_handlers()
+        handlers = [h for h in self.dataLogger.handlers if h not in queued]
+        if handlers:
+            writer.register(self.name, handlers)
+        for handler in handlers:
+            self.dataLogger.removeHandler(handler)
+        if not queued:
+            self.dataLogger.addHandler(_EnqueueHandler(writer))
+
     def file_handler(self, log_rotate_interval):
 
         self.fileHandler = CustomTimedRotatingFileHandler(
@@ -130,11 +383,10 @@ class Logger:
         # Create a symbolic link from the TTY to a fixed path
         os.symlink(terminal_path, link_path)
 
-        try:
-            # Open the master side of the PTY for writing
-            terminal_stream = os.fdopen(master_fd, "w", buffering=1)  # Line buffering
-        except FileNotFoundError:
-            raise Exception(f"Terminal {terminal_path} not found")
+        # Write to the master side of the PTY without blocking, a console
+        # nobody reads must not stall the monitoring thread
+        terminal_stream = ConsoleSink(master_fd, self.console_buffer_lines)
+        self.consoleSink = terminal_stream
 
         # Set up logger if it doesn't exist
         if not hasattr(self, "consoleLogger"):
@@ -191,6 +443,25 @@ class Logger:
             logger=self.consoleLogger, level=self.coloredlogs_level, fmt=fmt
         )
 
+    def set_verbose(self, verbose):
+        """
+        Change the verbose level of a running logger.
+
+        Args:
+            verbose (int): Verbose level, as given to the constructor.
+        """
+        self.setup_level(verbose)
+        # The console handlers are the stream and colored handlers, wherever
+        # they are attached (the logger or the background writer)
+        writer = QueuedLogWriter._instance
+        handlers = writer.routes.get(self.name, ()) if writer else ()
+        for handler in list(self.consoleLogger.handlers) + list(handlers):
+            if handler is self.fileHandler or isinstance(handler, _EnqueueHandler):
+                continue
+            handler.setLevel(self.console_level)
+        self.fileHandler.setLevel(self.data_logger_level)
+        self.consoleLogger.setLevel(self.console_level)
+
     def setup_level(self, verbose):
         # Determine logging levels based on verbose parameter
         if verbose >= 3:
@@ -0,0 +1,187 @@
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "radcontrol_dut_"
+
+# (name, type, help) of the per-DUT metrics, in exposition order
+DUT_METRICS = [
+    ("bytes_read_total", "counter", "Bytes read from the DUT connection."),
+    (
+        "frames_total",
+        "counter",
+        "Frames extracted from the DUT stream, CRC errors included.",
+    ),
+    ("crc_errors_total", "counter", "Frames received with a CRC error."),
+    (
+        "resync_bytes_total",
+        "counter",
+        "Bytes discarded while resynchronizing on a frame header.",
+    ),
+    ("timeouts_total", "counter", "Monitoring runs ended by a receive timeout."),
+    ("power_cycles_total", "counter", "Power cycles requested for the DUT."),
+    ("power_cycle_failures_total", "counter", "Power cycles that failed."),
+    ("reconnects_total", "counter", "Connections opened after the first one."),
+    ("frames_per_second", "gauge", "Frame rate since the previous scrape."),
+    (
+        "queue_depth",
+        "gauge",
+        "Frame batches waiting for the monitor, thread engine only.",
+    ),
+    (
+        "last_frame_age_seconds",
+        "gauge",
+        "Seconds since the last frame, NaN before the first one.",
+    ),
+    ("up", "gauge", "1 while the DUT is monitored, 0 otherwise."),
+]
+
+
+class DUTMetrics:
+    """
+    Counters of one DUT, incremented in place by its read and monitor threads.
+
+    Every counter is a plain integer attribute with a single writing thread,
+    so counting costs one attribute update and no lock. A scrape may read a
+    value a few increments old.
+    """
+
+    def __init__(self):
+        self.bytes_read = 0
+        self.frames = 0
+        self.crc_errors = 0
+        self.resync_bytes = 0
+        self.timeouts = 0
+        self.power_cycles = 0
+        self.power_cycle_failures = 0
+        self.connections = 0
+
+        self._rate_time = time.monotonic()
+        self._rate_frames = 0
+        self._rate = 0.0
+
+    def frame_rate(self, now):
+        """
+        Frames per second since the previous call, averaged over at least one
+        second so close scrapes do not jitter.
+        """
+        elapsed = now - self._rate_time
+        if elapsed >= 1.0:
+            frames = self.frames
+            self._rate = (frames - self._rate_frames) / elapsed
+            self._rate_time = now
+            self._rate_frames = frames
+        return self._rate
+
+    def sample(self, now):
+        """
+        Return the counters and the frame rate by metric name.
+        """
+        return {
+            "bytes_read_total": self.bytes_read,
+            "frames_total": self.frames,
+            "crc_errors_total": self.crc_errors,
+            "resync_bytes_total": self.resync_bytes,
+            "timeouts_total": self.timeouts,
+            "power_cycles_total": self.power_cycles,
+            "power_cycle_failures_total": self.power_cycle_failures,
+            "reconnects_total": max(self.connections - 1, 0),
+            "frames_per_second": self.frame_rate(now),
+        }
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        return repr(value)
+    return str(value)
+
+
+def format_metrics(samples):
+    """
+    Format per-DUT samples in the Prometheus text exposition format.
+
+    Args:
+        samples (dict): Maps DUT names to dicts of metric values, keyed by the
+            names in DUT_METRICS. Missing metrics are left out.
+
+    Returns:
+        str: The metrics page.
+    """
+    lines = []
+    for name, metric_type, help_text in DUT_METRICS:
+        rows = [
+            f'{PREFIX}{name}{{dut="{_escape_label(dut_name)}"}} '
+            f"{_format_value(values[name])}"
+            for dut_name, values in samples.items()
+            if name in values
+        ]
+        if not rows:
+            continue
+        lines.append(f"# HELP {PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {PREFIX}{name} {metric_type}")
+        lines.extend(rows)
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        try:
+            body = self.server.collect().encode()
+        except Exception as e:
+            self.send_error(500, str(e))
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    """
+    HTTP endpoint serving metrics in the Prometheus text format at /metrics.
+
+    The page is built by collect on every request, from the thread of that
+    request, so nothing is computed while nobody scrapes.
+
+    Args:
+        collect (callable): Returns the metrics page as a string.
+        host (str): Address to listen on, localhost by default.
+        port (int): Port to listen on, 0 picks a free one.
+
+    Raises:
+        OSError: If the port cannot be bound.
+    """
+
+    def __init__(self, collect, host="127.0.0.1", port=9108):
+        self.server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self.server.daemon_threads = True
+        self.server.collect = collect
+        self.thread = None
+
+    @property
+    def address(self):
+        host, port = self.server.server_address[:2]
+        return f"{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,100 @@
+import re
+
+# Message of a repeat record: the repeated frame, how many more times it was
+# received after its full line, and the first and last of those receptions
+REPEAT_PATTERN = re.compile(rb"^([0-9a-f]+) \*(\d+) (\d+\.\d+)-(\d+\.\d+)$")
+
+
+def format_repeat(frame, count, first, last):
+    """
+    Build the log message of a repeat record, ``<hex> *<count> <first>-<last>``.
+
+    Args:
+        frame (bytes): The repeated frame.
+        count (int): Number of repeats after the full line of the frame.
+        first (float): Reception time of the first repeat, seconds since epoch.
+        last (float): Reception time of the last repeat, seconds since epoch.
+
+    Returns:
+        str: The log message.
+    """
+    return f"{frame.hex()} *{count} {first:.3f}-{last:.3f}"
+
+
+def parse_repeat(message):
+    """
+    Parse the message of a repeat record.
+
+    Args:
+        message (bytes): Log message, without timestamp and level.
+
+    Returns:
+        tuple: (frame, count, first, last), None if the message is not a
+        repeat record.
+    """
+    match = REPEAT_PATTERN.match(message.rstrip())
+    if match is None:
+        return None
+    frame, count, first, last = match.groups()
+    return bytes.fromhex(frame.decode()), int(count), float(first), float(last)
+
+
+class RepeatCollapser:
+    """
+    Collapse consecutive identical frames of each frame ID into repeat records.
+
+    The first frame of a run is logged in full. Identical frames of the same ID
+    that follow are only counted, and written as one repeat record with their
+    count and first/last reception time once a different frame of that ID
+    arrives. Frames are never dropped, the log can be expanded back to every
+    reception.
+
+    Args:
+        flush_interval (float): Seconds after which a run still going on is
+            written anyway, so the log shows the DUT is alive.
+    """
+
+    def __init__(self, flush_interval=60.0):
+        self.flush_interval = flush_interval
+        self._runs = {}  # Maps frame IDs to [frame, count, first, last]
+
+    def feed(self, frame, timestamp):
+        """
+        Account a received frame.
+
+        Args:
+            frame (bytes): The complete frame.
+            timestamp (float): Reception time, seconds since epoch.
+
+        Returns:
+            list: Log messages to write, in order. Empty while a run goes on.
+        """
+        run = self._runs.get(frame[1])
+        if run is not None and run[0] == frame:
+            if run[1] == 0:
+                run[2] = timestamp
+            run[1] += 1
+            run[3] = timestamp
+            if timestamp - run[2] >= self.flush_interval:
+                message = format_repeat(*run)
+                run[1] = 0
+                return [message]
+            return []
+
+        messages = []
+        if run is not None and run[1]:
+            messages.append(format_repeat(*run))
+        self._runs[frame[1]] = [frame, 0, None, None]
+        messages.append(frame.hex())
+        return messages
+
+    def flush(self):
+        """
+        End every run, e.g. when monitoring stops.
+
+        Returns:
+            list: Repeat records of the runs with pending repeats.
+        """
+        messages = [format_repeat(*run) for run in self._runs.values() if run[1]]
+        self._runs.clear()
+        return messages